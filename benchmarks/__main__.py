@@ -0,0 +1,217 @@
+"""
+Benchmark the merge functions on a synthetic address corpus.
+
+Run from the root of the repository with::
+
+    python -m benchmarks --sizes 1000 10000
+
+For each benchmark and size, this reports the best wall time, the peak
+memory allocated (traced with :mod:`tracemalloc`, in a separate run), and
+the recall and precision of the matches against the known true matches.
+"""
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+import schuylkill as skool
+
+from .addresses import make_addresses
+
+
+def _merges(workers):
+    """
+    The merge benchmarks, as functions of the (cleaned) left and right data.
+    """
+    fuzzy = dict(score_cutoff=85, workers=workers)
+    tf_idf = dict(score_cutoff=50)
+
+    return {
+        "exact": lambda left, right: skool.exact_merge(left, right, on="address"),
+        "startswith": lambda left, right: skool.exact_merge(
+            left, right, on="address", how="startswith"
+        ),
+        "contains": lambda left, right: skool.exact_merge(
+            left, right, on="address", how="contains"
+        ),
+        "fuzzy": lambda left, right: skool.fuzzy_merge(
+            left, right, on="address", **fuzzy
+        ),
+        "tf_idf": lambda left, right: skool.tf_idf_merge(
+            left, right, on="address", **tf_idf
+        ),
+        "pipe": lambda left, right: skool.exact_merge(left, right, on="address")
+        .pipe(skool.exact_merge, left, right, on="address", how="startswith")
+        .pipe(skool.fuzzy_merge, left, right, on="address", **fuzzy)
+        .pipe(skool.tf_idf_merge, left, right, on="address", **tf_idf),
+        "cascade": lambda left, right: skool.cascade(
+            left,
+            right,
+            ["exact", "startswith", ("fuzzy", fuzzy), ("tf_idf", tf_idf)],
+            on="address",
+        ),
+    }
+
+
+def _clean(left, right):
+    """
+    Clean the left and right addresses.
+    """
+    return (
+        skool.clean_strings(left, ["address"]),
+        skool.clean_strings(right, ["address"]),
+    )
+
+
+def _measure(func, args, repeat, memory):
+    """
+    Return the output, the best time in seconds, and the peak memory in MB
+    of calling the input function.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    peak = float("nan")
+    if memory:
+        tracemalloc.start()
+        try:
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    return out, best, peak
+
+
+def _scores(merged, left):
+    """
+    Return the recall and precision of the matches in the merged data.
+    """
+    matched = merged.dropna(subset=["right_index"])
+    correct = (
+        matched["right_index"].astype(int) == left.loc[matched.index, "true_index"]
+    )
+
+    # count each left row once, if any of its matches are correct
+    correct = correct.groupby(level=0).any()
+    recall = correct.sum() / left["true_index"].notnull().sum()
+    precision = correct.sum() / max(len(correct), 1)
+    return recall, precision
+
+
+def run(sizes, names=None, repeat=1, workers=1, memory=True):
+    """
+    Run the benchmarks.
+
+    Parameters
+    ----------
+    sizes : list of int
+        the numbers of left and right rows to benchmark
+    names : list of str, optional
+        the benchmarks to run; by default, all of them
+    repeat : int, optional
+        the number of times to time each benchmark
+    workers : int, optional
+        the number of processes for the fuzzy matching
+    memory : bool, optional
+        whether to trace the peak memory
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        the time, peak memory, recall and precision of each benchmark
+    """
+    merges = _merges(workers)
+    if names is None:
+        names = ["clean_strings"] + list(merges)
+
+    results = []
+    for size in sizes:
+        left, right = make_addresses(size)
+
+        # clean the strings first, as in a real merge
+        (clean_left, clean_right), seconds, peak = _measure(
+            _clean, (left, right), repeat, memory
+        )
+        if "clean_strings" in names:
+            results.append(
+                dict(
+                    benchmark="clean_strings", size=size, seconds=seconds, peak_mb=peak
+                )
+            )
+
+        for name in names:
+            if name not in merges:
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                merged, seconds, peak = _measure(
+                    merges[name], (clean_left, clean_right), repeat, memory
+                )
+            recall, precision = _scores(merged, left)
+            results.append(
+                dict(
+                    benchmark=name,
+                    size=size,
+                    seconds=seconds,
+                    peak_mb=peak,
+                    recall=recall,
+                    precision=precision,
+                )
+            )
+
+            print(f"{name} ({size} rows): {seconds:.3f} s", flush=True)
+
+    return pd.DataFrame(
+        results,
+        columns=["benchmark", "size", "seconds", "peak_mb", "recall", "precision"],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="the numbers of left and right rows",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=["clean_strings"] + list(_merges(1)),
+        help="only run these benchmarks",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="the number of timings")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="the processes for fuzzy matching"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip tracing the peak memory"
+    )
+    parser.add_argument("--output", help="save the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.sizes,
+        names=args.only,
+        repeat=args.repeat,
+        workers=args.workers,
+        memory=not args.no_memory,
+    )
+    print()
+    print(results.to_string(index=False, float_format="{:.3f}".format))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+__all__ = ["make_addresses"]
+
+# the street names, directions and suffixes to build addresses from
+STREETS = [
+    "Market",
+    "Chestnut",
+    "Walnut",
+    "Locust",
+    "Spruce",
+    "Pine",
+    "Lombard",
+    "South",
+    "Bainbridge",
+    "Christian",
+    "Washington",
+    "Federal",
+    "Ellsworth",
+    "Passyunk",
+    "Snyder",
+    "Oregon",
+    "Broad",
+    "Arch",
+    "Race",
+    "Vine",
+    "Spring Garden",
+    "Fairmount",
+    "Girard",
+    "Columbia",
+    "Diamond",
+    "Susquehanna",
+    "Dauphin",
+    "York",
+    "Lehigh",
+    "Allegheny",
+    "Erie",
+    "Hunting Park",
+    "Roosevelt",
+    "Cottman",
+    "Frankford",
+    "Germantown",
+    "Ridge",
+    "Lancaster",
+    "Baltimore",
+    "Woodland",
+    "Kingsessing",
+    "Cecil B Moore",
+    "Montgomery",
+    "Oxford",
+    "Castor",
+    "Rising Sun",
+    "Aramingo",
+    "Torresdale",
+    "Wissahickon",
+    "Henry",
+    "Lincoln",
+    "Stenton",
+    "Chelten",
+    "Wyoming",
+    "Olney",
+    "Tabor",
+    "Bustleton",
+    "Academy",
+    "Grant",
+    "Welsh",
+]
+DIRECTIONS = {"": "", "N": "North", "S": "South", "E": "East", "W": "West"}
+SUFFIXES = {
+    "St": "Street",
+    "Ave": "Avenue",
+    "Rd": "Road",
+    "Blvd": "Boulevard",
+    "Ln": "Lane",
+    "Pl": "Place",
+    "Dr": "Drive",
+}
+
+
+def _typo(rng, word):
+    """
+    Add a single typo (substitution, deletion, insertion or transposition)
+    to the input word.
+    """
+    if len(word) < 3:
+        return word
+
+    i = rng.randint(1, len(word) - 1)
+    kind = rng.randint(4)
+    if kind == 0:
+        return word[:i] + chr(rng.randint(97, 123)) + word[i + 1 :]
+    elif kind == 1:
+        return word[:i] + word[i + 1 :]
+    elif kind == 2:
+        return word[:i] + chr(rng.randint(97, 123)) + word[i:]
+    else:
+        return word[: i - 1] + word[i] + word[i - 1] + word[i + 1 :]
+
+
+def _add_noise(rng, number, direction, street, suffix, noise):
+    """
+    Format the parts of an address as a noisy human-entered string.
+    """
+    # spell out or drop the direction
+    if direction and rng.random_sample() < noise:
+        direction = DIRECTIONS[direction] if rng.random_sample() < 0.5 else ""
+
+    # spell out or drop the suffix
+    if rng.random_sample() < noise:
+        suffix = SUFFIXES[suffix] if rng.random_sample() < 0.5 else ""
+
+    # misspell the street name
+    if rng.random_sample() < noise:
+        street = _typo(rng, street)
+
+    address = " ".join(part for part in [number, direction, street, suffix] if part)
+    return address.upper() if rng.random_sample() < 0.5 else address
+
+
+def make_addresses(n_left, n_right=None, noise=0.3, match_fraction=0.9, seed=42):
+    """
+    Generate a deterministic, synthetic corpus of street addresses, where
+    the left addresses are noisy copies of the right addresses.
+
+    Parameters
+    ----------
+    n_left : int
+        the number of left (messy) addresses
+    n_right : int, optional
+        the number of right (reference) addresses; defaults to `n_left`
+    noise : float, optional
+        the probability of each kind of error (a typo, an abbreviation
+        change, a dropped suffix) in each left address
+    match_fraction : float, optional
+        the fraction of left addresses that are copies of a right address;
+        the rest are not in the right data
+    seed : int, optional
+        the random seed
+
+    Returns
+    -------
+    left, right : pandas.DataFrame
+        the left data, with the "address" and the "true_index" of the
+        matching right row (missing for unmatched addresses), and the right
+        data, with the unique "address" and an "id"
+    """
+    if n_right is None:
+        n_right = n_left
+    rng = np.random.RandomState(seed)
+
+    # generate the unique addresses: the right data, and the unmatched ones
+    n_unmatched = int(round(n_left * (1 - match_fraction)))
+    size = n_right + n_unmatched
+    parts = pd.DataFrame(columns=["number", "direction", "street", "suffix"])
+    while len(parts) < size:
+        new = pd.DataFrame(
+            {
+                "number": rng.randint(1, 10000, size=2 * size).astype(str),
+                "direction": rng.choice(list(DIRECTIONS), size=2 * size),
+                "street": rng.choice(STREETS, size=2 * size),
+                "suffix": rng.choice(list(SUFFIXES), size=2 * size),
+            }
+        )
+        parts = pd.concat([parts, new], ignore_index=True).drop_duplicates()
+    parts = parts.iloc[:size].reset_index(drop=True)
+
+    # the clean reference data
+    address = parts["number"].str.cat(
+        [parts["direction"], parts["street"], parts["suffix"]], sep=" "
+    )
+    address = address.str.replace(r"\s+", " ", regex=True)
+    right = pd.DataFrame(
+        {"address": address.iloc[:n_right].values, "id": np.arange(n_right)}
+    )
+
+    # the left data: copies of right addresses, and some that don't match
+    n_matched = n_left - n_unmatched
+    true_index = np.concatenate(
+        [
+            rng.randint(0, n_right, size=n_matched),
+            np.arange(n_right, size),
+        ]
+    )
+    true_index = true_index[rng.permutation(n_left)]
+    rows = list(parts.itertuples(index=False, name=None))
+    left = pd.DataFrame(
+        {
+            "address": [_add_noise(rng, *rows[i], noise) for i in true_index],
+            "true_index": pd.Series(true_index).where(true_index < n_right),
+        }
+    )
+
+    return left, right
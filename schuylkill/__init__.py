@@ -2,7 +2,15 @@ from importlib.metadata import version
 
 __version__ = version(__package__)
 
+from .cache import MatchCache
+from .cascade import cascade
 from .exact import exact_merge
-from .fuzzy import fuzzy_merge
+from .fuzzy import WorkerPool, fuzzy_merge
+from .index import MatchIndex
+from .minhash import minhash_merge
+from .phonetic import phonetic_merge
+from .server import MatchServer, serve
+from .stream import stream_merge
 from .tf_idf import tf_idf_merge
+from .tokens import token_merge
 from .utils import clean_strings
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["MatchCache"]
+
+
+class MatchCache:
+    """
+    A persistent, on-disk cache of the matches of distinct left strings,
+    stored in a SQLite database.
+
+    Pass the cache as the `cache` argument of :func:`fuzzy_merge` or
+    :func:`tf_idf_merge`: only the left strings missing from the cache are
+    matched, and their matches are added to it. The matches are keyed by
+    the left string, the merge method and its parameters, and a fingerprint
+    of the right strings, so the cached matches are not used once the right
+    data changes.
+
+    Notes
+    -----
+    -   Once the cache grows beyond `max_size`, the least recently used
+        matches are removed, including any for out-of-date right data.
+
+    Parameters
+    ----------
+    path : str
+        the path of the database file; it is created if necessary
+    max_size : int, optional
+        the maximum size of the cached matches, in bytes
+    """
+
+    def __init__(self, path, max_size=2 ** 30):
+        self.path = path
+        self.max_size = max_size
+
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS matches (
+                    context TEXT NOT NULL,
+                    string TEXT NOT NULL,
+                    matches TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    used INTEGER NOT NULL,
+                    PRIMARY KEY (context, string)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS matches_used ON matches (used)"
+            )
+        (self._clock,) = self._connection.execute(
+            "SELECT COALESCE(MAX(used), 0) FROM matches"
+        ).fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def clear(self):
+        """
+        Remove all of the cached matches.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM matches")
+
+    def _tick(self):
+        """
+        Advance the clock recording when the matches were last used.
+        """
+        self._clock += 1
+        return self._clock
+
+    def lookup(self, context, strings):
+        """
+        Return the cached matches of the input strings.
+
+        Parameters
+        ----------
+        context : str
+            the key of the merge method, its parameters and the right data,
+            from :func:`_context`
+        strings : sequence of str
+            the distinct left strings
+
+        Returns
+        -------
+        cached : dict
+            the list of (right code, score) matches of each cached string
+        """
+        used = self._tick()
+        cached = {}
+        with self._connection:
+            # SQLite limits the number of parameters in a query
+            for start in range(0, len(strings), 500):
+                chunk = list(strings[start : start + 500])
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT string, matches FROM matches "
+                    f"WHERE context = ? AND string IN ({placeholders})",
+                    [context, *chunk],
+                ).fetchall()
+                self._connection.execute(
+                    f"UPDATE matches SET used = ? "
+                    f"WHERE context = ? AND string IN ({placeholders})",
+                    [used, context, *chunk],
+                )
+                cached.update((string, json.loads(found)) for string, found in rows)
+
+        return {string: [tuple(m) for m in found] for string, found in cached.items()}
+
+    def store(self, context, matches):
+        """
+        Add the matches of the input strings to the cache, removing the least
+        recently used matches if the cache is full.
+
+        Parameters
+        ----------
+        context : str
+            the key of the merge method, its parameters and the right data,
+            from :func:`_context`
+        matches : dict
+            the list of (right code, score) matches of each string
+        """
+        used = self._tick()
+        rows = []
+        for string, found in matches.items():
+            found = json.dumps([[int(code), score] for code, score in found])
+            rows.append((context, string, found, len(string) + len(found), used))
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used matches until the cache fits in
+        `max_size`.
+        """
+        (size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM matches"
+        ).fetchone()
+        if size <= self.max_size:
+            return
+
+        rows = self._connection.execute(
+            "SELECT rowid, size FROM matches ORDER BY used"
+        ).fetchall()
+        rowids, sizes = np.array(rows, dtype=np.int64).reshape(-1, 2).T
+        count = np.searchsorted(np.cumsum(sizes), size - self.max_size) + 1
+        self._connection.executemany(
+            "DELETE FROM matches WHERE rowid = ?",
+            [(int(rowid),) for rowid in rowids[:count]],
+        )
+
+
+def _context(method, right_unique, *arrays, **params):
+    """
+    Return the cache key of the merge method, its parameters, and the right
+    data, given by the distinct right strings and any other numeric arrays
+    the matches depend on.
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([method, sorted(params.items())]).encode())
+    digest.update("\0".join(right_unique).encode("utf-8", "surrogatepass"))
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+
+    return digest.hexdigest()
+
+
+def _cached_matches(cache, context, values, match):
+    """
+    Return the matches of the input distinct strings, matching only the
+    strings missing from the cache.
+
+    Parameters
+    ----------
+    cache : MatchCache or None
+        the cache; if None, all strings are matched
+    context : str
+        the cache key of the merge method, its parameters and the right data
+    values : numpy.ndarray
+        the distinct left strings
+    match : callable
+        a function of the positions of the strings to match, returning their
+        matches as a data frame with the "left_code" position of each string,
+        and the "right_code" and "score" of its matches; it is only called if
+        any of the strings are missing from the cache
+
+    Returns
+    -------
+    found : pandas.DataFrame
+        the matches of all of the strings
+    hits : int
+        the number of strings found in the cache
+    """
+    if cache is None:
+        return match(np.arange(len(values))), 0
+
+    cached = cache.lookup(context, values)
+    missing = np.array(
+        [i for i, value in enumerate(values) if value not in cached], dtype=int
+    )
+    found = pd.DataFrame(columns=["left_code", "right_code", "score"])
+    if len(missing):
+        found = match(missing)
+
+        # store the matches of the new strings, including any without matches
+        new = {values[i]: [] for i in missing}
+        for left_code, right_code, score in zip(
+            found["left_code"], found["right_code"], found["score"].tolist()
+        ):
+            new[values[left_code]].append((right_code, score))
+        cache.store(context, new)
+
+    cached = pd.DataFrame(
+        [
+            (left_code, right_code, score)
+            for left_code, value in enumerate(values)
+            for right_code, score in cached.get(value, [])
+        ],
+        columns=["left_code", "right_code", "score"],
+    )
+    if len(cached):
+        found = pd.concat([found, cached], ignore_index=True) if len(found) else cached
+    return found, len(values) - len(missing)
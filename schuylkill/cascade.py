@@ -0,0 +1,217 @@
+import inspect
+from functools import partial
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from .exact import _exact_matches
+from .fuzzy import _fuzzy_matches
+from .index import MatchIndex, _unpack_index
+from .minhash import _minhash_matches
+from .phonetic import _phonetic_matches
+from .tf_idf import _tf_idf_matches
+from .tokens import _token_matches
+from .utils import _Profile
+
+__all__ = ["cascade"]
+
+
+# the function matching the left strings for each stage method
+_MATCHERS = {
+    "exact": partial(_exact_matches, how="exact"),
+    "startswith": partial(_exact_matches, how="startswith"),
+    "contains": partial(_exact_matches, how="contains"),
+    "fuzzy": _fuzzy_matches,
+    "minhash": _minhash_matches,
+    "tf_idf": _tf_idf_matches,
+    "token": _token_matches,
+    "phonetic": _phonetic_matches,
+}
+
+
+# the arguments of the stage matchers that are set by the cascade itself
+_INTERNAL_ARGUMENTS = {
+    "left_values",
+    "right",
+    "right_on",
+    "index",
+    "how",
+    "left_blocks",
+    "right_blocks",
+    "profiler",
+}
+
+
+def _parse_stage(stage):
+    """
+    Return the method and keyword arguments of the input stage, checking
+    that the stage accepts the arguments.
+    """
+    if isinstance(stage, str):
+        method, kwargs = stage, {}
+    else:
+        method, kwargs = stage
+
+    if method not in _MATCHERS:
+        raise ValueError(f"stage method should be one of: {', '.join(_MATCHERS)}")
+
+    accepted = set(inspect.signature(_MATCHERS[method]).parameters)
+    accepted -= _INTERNAL_ARGUMENTS
+    unknown = set(kwargs) - accepted
+    if unknown:
+        raise ValueError(
+            f"the '{method}' stage doesn't accept: {', '.join(sorted(unknown))}; "
+            f"it accepts: {', '.join(sorted(accepted)) or 'no arguments'}"
+        )
+    return method, dict(kwargs)
+
+
+def cascade(
+    left: pd.DataFrame,
+    right: Union[pd.DataFrame, MatchIndex],
+    stages: list,
+    on: str = None,
+    left_on: str = None,
+    right_on: str = None,
+    suffixes=("_x", "_y"),
+    profile: bool = False,
+):
+    """
+    Merge two dataframes by running several matching stages in turn, where
+    each stage only matches the left rows unmatched by the previous stages.
+
+    This gives the same matches as chaining the merge functions with
+    :meth:`pandas.DataFrame.pipe`, but each stage only looks at the
+    remaining left strings and the merged data frame is assembled once.
+
+    Notes
+    -----
+    -   This performs a "left" merge — all rows in the left data frame will be
+        present in the returned data frame
+    -   Data in the left data frame can match multiple values in the right column.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+        the left data to merge
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    stages : list
+        the matching stages to run, in order; each stage is one of 'exact',
+        'startswith', 'contains', 'fuzzy', 'minhash', 'tf_idf', 'token', or
+        'phonetic', or a tuple of the method and a dict of keyword arguments
+        for the corresponding merge function, e.g.,
+        ``("fuzzy", {"score_cutoff": 80})``. Only the arguments controlling
+        the matching, such as `score_cutoff`, `max_matches`, `scorer`,
+        `workers` or `chunk_size`, are accepted, and only if the stage's
+        merge function has them; the columns to merge on, `suffixes`, `by`
+        and `profile` aren't
+    on : str, optional
+        the column to merge on
+    left_on : str, optional
+        the name of the string column in the left data frame to merge on
+    right_on : str, optional
+        the name of the string column in the right data frame to merge on
+    suffixes : tuple of (str, str), default ('_x', '_y')
+        Suffix to apply to overlapping column names in the left and right
+        side, respectively.
+    profile : bool, optional
+        whether to record the wall time of each stage, along with the number
+        of rows, distinct strings and pairs of strings processed, in the
+        "profile" entry of the `attrs` of the returned data frame; the
+        profile of each stage is stored under "stages"
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        the merged dataframe containg all rows in `left` and any matched data
+        from the `right` data frame; the "match_probability" is missing for
+        rows matched by the 'exact', 'startswith', and 'contains' stages
+    """
+    if on is not None:
+        left_on = right_on = on
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
+
+    # Verify input parameters
+    if left_on is None or right_on is None:
+        raise ValueError("Please specify `on` or `left_on/right_on`")
+    if left_on not in left.columns:
+        raise ValueError(f"'{left_on}' is not a column in `left`")
+    if right_on not in right.columns:
+        raise ValueError(f"'{right_on}' is not a column in `right`")
+    stages = [_parse_stage(stage) for stage in stages]
+
+    # Run each stage on the left rows that are still unmatched
+    profiler = _Profile()
+    profiles = []
+    left_values = left[left_on]
+    unmatched = np.ones(len(left), dtype=bool)
+    found = []
+    for method, kwargs in stages:
+        remaining = np.flatnonzero(unmatched)
+        if not len(remaining):
+            break
+
+        stage_profiler = _Profile()
+        matches = _MATCHERS[method](
+            left_values.iloc[remaining],
+            right,
+            right_on,
+            index,
+            profiler=stage_profiler,
+            **kwargs,
+        )
+        if "match_probability" not in matches.columns:
+            matches["match_probability"] = np.nan
+
+        # map back to the positions in the full left data
+        matches["left_pos"] = remaining[matches["left_pos"].values]
+        unmatched[matches["left_pos"].values] = False
+        found.append(matches)
+
+        profiler.lap(method)
+        profiles.append(dict(method=method, **stage_profiler.to_dict()))
+
+    # Add the unmatched rows, without a right position
+    found.append(
+        pd.DataFrame(
+            {
+                "left_pos": np.flatnonzero(unmatched),
+                "right_pos": -1,
+                "match_probability": np.nan,
+            }
+        )
+    )
+    rows = pd.concat(found, ignore_index=True).sort_values("left_pos", kind="stable")
+
+    # the left and right rows, with suffixes for any intersecting columns
+    intersecting = left.columns.intersection(right.columns)
+    left_rows = left.iloc[rows["left_pos"].values].rename(
+        columns={col: f"{col}{suffixes[0]}" for col in intersecting}
+    )
+    right_rows = (
+        right.rename(columns={col: f"{col}{suffixes[1]}" for col in intersecting})
+        .rename_axis("right_index")
+        .reset_index()
+        .reindex(rows["right_pos"].values)
+    )
+
+    # return all the data, with columns in the proper order
+    out = pd.concat(
+        [
+            left_rows.reset_index(drop=True),
+            rows[["match_probability"]].reset_index(drop=True),
+            right_rows.reset_index(drop=True),
+        ],
+        axis=1,
+    )
+    out.index = left_rows.index
+    profiler.lap("assemble")
+
+    if profile:
+        profiler.count(left_rows=len(left), matched_rows=(~unmatched).sum())
+        profiler.attach(out, "cascade")
+        out.attrs["profile"]["stages"] = profiles
+    return out
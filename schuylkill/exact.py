@@ -1,16 +1,525 @@
+import operator
+import sys
+from typing import Union
+
+import numpy as np
 import pandas as pd
-from .utils import pipeable
+from .index import MatchIndex, _unpack_index
+from .utils import _Profile, _factorize, pipeable
+
+
+def _expand_ranges(starts, counts):
+    """
+    Expand contiguous (start, count) ranges into a flat array of positions.
+    """
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + np.arange(counts.sum()) - offsets
+
+
+def _group_positions(codes, n, positions):
+    """
+    Group the input positions by their integer codes, preserving the input
+    order within each group.
+
+    Returns
+    -------
+    positions, starts, counts : numpy.ndarray
+        the grouped positions, and the start and length of the block of
+        positions for each of the ``n`` codes
+    """
+    counts = np.bincount(codes, minlength=n)
+    positions = positions[np.argsort(codes, kind="stable")]
+    return positions, np.cumsum(counts) - counts, counts
+
+
+def _broadcast(left_groups, right_groups, found, limit):
+    """
+    Broadcast the matches between distinct strings back to the left and
+    right rows, keeping the best `limit` scores per left row and then the
+    first rows in `right`.
+
+    Parameters
+    ----------
+    left_groups, right_groups : tuple of numpy.ndarray
+        the positions of the left and right rows grouped by their distinct
+        string, from :func:`_group_positions`
+    found : tuple of numpy.ndarray
+        the left code, right code and score of each match between distinct
+        strings
+    limit : int
+        the maximum number of matches per left row
+
+    Returns
+    -------
+    left_pos, right_pos, score : numpy.ndarray
+        the matched rows, sorted by left position
+    """
+    left_codes, right_codes, scores = found
+    left_positions, left_starts, left_counts = left_groups
+    right_positions, right_starts, right_counts = right_groups
+
+    # expand each match to the left rows, and then to the right rows
+    counts = left_counts[left_codes]
+    pairs = np.repeat(np.arange(len(scores)), counts)
+    left_pos = left_positions[_expand_ranges(left_starts[left_codes], counts)]
+    counts = right_counts[right_codes[pairs]]
+    right_pos = right_positions[
+        _expand_ranges(right_starts[right_codes[pairs]], counts)
+    ]
+    left_pos, pairs = np.repeat(left_pos, counts), np.repeat(pairs, counts)
+    scores = scores[pairs]
+
+    # keep the first matches of each left row, by score and then right row
+    order = np.lexsort((right_pos, -scores, left_pos))
+    left_pos, right_pos, scores = left_pos[order], right_pos[order], scores[order]
+    first = np.searchsorted(left_pos, left_pos, side="left")
+    keep = np.arange(len(left_pos)) - first < limit
+    return left_pos[keep], right_pos[keep], scores[keep]
+
+
+def _broadcast_matches(
+    found, left_pos, left_codes, right_pos, right_codes, limit, scale=100
+):
+    """
+    Internal function to broadcast the matches between distinct strings back
+    to the left and right rows, keeping the best `limit` scores per left row
+    and then the first rows in `right`.
+
+    Parameters
+    ----------
+    found : pandas.DataFrame
+        the matches between distinct strings, with the "left_code",
+        "right_code" and "score" (out of `scale`)
+    left_pos, right_pos : numpy.ndarray
+        the positions of the left and right rows
+    left_codes, right_codes : numpy.ndarray
+        the distinct string of each left and right row
+    limit : int
+        the maximum number of matches per left row
+    scale : float, optional
+        the score of a perfect match
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the "left_pos", "right_pos" and "match_probability" of the matched rows
+    """
+    left_found = found["left_code"].to_numpy(dtype=np.int64)
+    right_found = found["right_code"].to_numpy(dtype=np.int64)
+    scores = found["score"].to_numpy(dtype=float)
+
+    # group the rows by their distinct string, including any distinct right
+    # strings of an index that no longer have rows
+    left_groups = _group_positions(
+        left_codes,
+        max(left_codes.max(initial=-1), left_found.max(initial=-1)) + 1,
+        left_pos,
+    )
+    right_groups = _group_positions(
+        right_codes,
+        max(right_codes.max(initial=-1), right_found.max(initial=-1)) + 1,
+        right_pos,
+    )
+    left_pos, right_pos, scores = _broadcast(
+        left_groups, right_groups, (left_found, right_found, scores), limit
+    )
+    return pd.DataFrame(
+        {
+            "left_pos": left_pos,
+            "right_pos": right_pos,
+            "match_probability": scores / scale,
+        }
+    )
+
+
+def _suffix_array(codes, depth):
+    """
+    Sort the suffixes of the input array of character codes by their first
+    ``depth`` characters, using prefix doubling.
+    """
+    rank = codes.astype(np.int64) + 1
+    if depth <= 1:
+        return np.argsort(rank, kind="stable")
+
+    k = 1
+    while k < depth:
+
+        # rank of the character k positions ahead; 0 past the end
+        ahead = np.zeros_like(rank)
+        ahead[: len(rank) - k] = rank[k:]
+
+        # sort by the pair of ranks and then re-rank
+        key = rank * (rank.max() + 1) + ahead
+        suffixes = np.argsort(key)
+        key = key[suffixes]
+        changed = np.ones(len(rank), dtype=bool)
+        changed[1:] = key[1:] != key[:-1]
+        rank = np.empty_like(rank)
+        rank[suffixes] = np.cumsum(changed)
+
+        if changed.all():
+            break
+        k *= 2
+
+    return suffixes
+
+
+def _compare(a, b):
+    """
+    Compare two strings, returning -1, 0 or 1.
+    """
+    return (a > b) - (a < b)
+
+
+def _string_positions(values):
+    """
+    Return the positions of the string elements of the input array.
+    """
+    return np.flatnonzero([isinstance(v, str) for v in values])
+
+
+def _factorize_only_strings(values):
+    """
+    Factorize the string values of the input Series, dropping any missing
+    or non-string values.
+
+    Returns
+    -------
+    positions, codes, uniques : numpy.ndarray
+        the positions of the string values, their codes, and the distinct
+        strings
+    """
+    positions, codes, uniques = _factorize(values)
+
+    # drop the codes of any non-string values
+    strings = _string_positions(uniques)
+    string_codes = np.full(len(uniques), -1)
+    string_codes[strings] = np.arange(len(strings))
+    codes = string_codes[codes]
+    valid = codes >= 0
+
+    return positions[valid], codes[valid], uniques[strings]
+
+
+def _expand_pairs(left_groups, right_groups, left_ids, right_ids):
+    """
+    Expand pairs of matching left and right groups of positions, from
+    :func:`_group_positions`, to all pairs of left and right positions.
+
+    Returns
+    -------
+    left_pos, right_pos : numpy.ndarray
+        the positions of the matched pairs, sorted by left and then right
+        position
+    """
+    left_positions, left_starts, left_counts = left_groups
+    right_positions, right_starts, right_counts = right_groups
+
+    counts = left_counts[left_ids]
+    right_ids = np.repeat(right_ids, counts)
+    left_pos = left_positions[_expand_ranges(left_starts[left_ids], counts)]
+    counts = right_counts[right_ids]
+    left_pos = np.repeat(left_pos, counts)
+    right_pos = right_positions[_expand_ranges(right_starts[right_ids], counts)]
+
+    order = np.lexsort((right_pos, left_pos))
+    return left_pos[order], right_pos[order]
+
+
+def _prefix_upper(prefix):
+    """
+    Return the smallest string ordered after every string starting with
+    the input prefix, or None if there is no such string.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class _HashIndex:
+    """
+    A hash table mapping each distinct right value to the positions
+    of the rows holding it.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        the right values to index; missing values never match
+    """
+
+    def __init__(self, values):
+        valid, codes, uniques = _factorize(values)
+
+        # group the positions by value, preserving the right order
+        self.uniques = pd.Index(uniques, dtype=object)
+        self.positions, self.starts, self.counts = _group_positions(
+            codes, len(uniques), valid
+        )
+
+    def lookup(self, values):
+        """
+        Find all (left, right) pairs of positions with equal values.
+
+        Parameters
+        ----------
+        values : pandas.Series
+            the left values to look up
+
+        Returns
+        -------
+        left_pos, right_pos : numpy.ndarray
+            the positions of the matched pairs, sorted by left and then
+            right position
+        """
+        # look up the distinct left values only
+        valid, codes, uniques = _factorize(values)
+        codes = self.uniques.get_indexer(uniques)[codes]
+        left_pos = valid[codes >= 0]
+        codes = codes[codes >= 0]
+
+        counts = self.counts[codes]
+        right_pos = self.positions[_expand_ranges(self.starts[codes], counts)]
+        return np.repeat(left_pos, counts), right_pos
+
+
+class _PrefixIndex:
+    """
+    A sorted array of the distinct right strings, where all strings sharing
+    a prefix form a contiguous block located by binary search.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        the right values to index; non-string values never match
+    """
+
+    def __init__(self, values):
+        valid, codes, uniques = _factorize_only_strings(values)
+        order = np.argsort(uniques)
+        rank = np.empty(len(uniques), dtype=np.int64)
+        rank[order] = np.arange(len(uniques))
+
+        # group the positions by sorted string, preserving the right order
+        self.strings = uniques[order]
+        self.positions, self.starts, self.counts = _group_positions(
+            rank[codes], len(uniques), valid
+        )
+
+    def lookup(self, values):
+        """
+        Find all (left, right) pairs of positions where the right string
+        starts with the left string.
+
+        Parameters
+        ----------
+        values : pandas.Series
+            the left prefixes to look up
+
+        Returns
+        -------
+        left_pos, right_pos : numpy.ndarray
+            the positions of the matched pairs, sorted by left and then
+            right position
+        """
+        valid, codes, prefixes = _factorize_only_strings(values)
+
+        # the block of sorted strings for each distinct prefix
+        starts = np.searchsorted(self.strings, prefixes, side="left")
+        stops = np.full(len(prefixes), len(self.strings))
+        upper = np.array([_prefix_upper(p) for p in prefixes], dtype=object)
+        bounded = np.flatnonzero(pd.notna(upper))
+        stops[bounded] = np.searchsorted(self.strings, upper[bounded], side="left")
+
+        # expand the (prefix, string) pairs to left and right positions
+        counts = stops - starts
+        return _expand_pairs(
+            _group_positions(codes, len(prefixes), valid),
+            (self.positions, self.starts, self.counts),
+            np.repeat(np.arange(len(prefixes)), counts),
+            _expand_ranges(starts, counts),
+        )
+
+
+class _SubstringIndex:
+    """
+    A suffix array over the distinct right strings, where all occurrences
+    of a substring form a contiguous block of sorted suffixes located by
+    binary search.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        the right values to index; non-string values never match
+    """
+
+    def __init__(self, values):
+        valid, codes, uniques = _factorize_only_strings(values)
+
+        # group the positions by string, preserving the right order
+        self.positions, self.starts, self.counts = _group_positions(
+            codes, len(uniques), valid
+        )
+
+        # concatenate the distinct strings into a single corpus
+        lengths = np.array([len(u) for u in uniques], dtype=np.int64)
+        self.offsets = np.cumsum(lengths + 1) - lengths - 1
+        self.ends = self.offsets + lengths
+        self.corpus = "\0".join(uniques)
+
+        # sort the suffixes of the corpus
+        chars = np.frombuffer(self.corpus.encode("utf-32-le"), dtype="<u4")
+        self.depth = lengths.max() if len(lengths) else 0
+        self.suffixes = _suffix_array(chars, self.depth)
+
+    def _bisect(self, patterns, lo, hi, side):
+        """
+        Binary search between ``lo`` and ``hi`` for the first suffix not
+        ordered before (``side="left"``) or ordered after (``side="right"``)
+        each pattern, comparing only the first ``len(pattern)`` characters.
+
+        Returns
+        -------
+        lo, upper : numpy.ndarray
+            the search result, and the first suffix seen to be ordered
+            after each pattern, which bounds the end of its block
+        """
+        corpus, suffixes = self.corpus, self.suffixes
+        lo, hi = lo.copy(), hi.copy()
+        upper = hi.copy()
+
+        active = np.flatnonzero(lo < hi)
+        while len(active):
+            mid = (lo[active] + hi[active]) // 2
+            order = np.array(
+                [
+                    _compare(corpus[i : i + len(p)], p)
+                    for i, p in zip(suffixes[mid], patterns[active])
+                ],
+                dtype=np.int8,
+            )
+            below = order < 0 if side == "left" else order <= 0
+            lo[active] = np.where(below, mid + 1, lo[active])
+            hi[active] = np.where(below, hi[active], mid)
+            upper[active] = np.where(order > 0, mid, upper[active])
+            active = active[lo[active] < hi[active]]
+
+        return lo, upper
+
+    def _search(self, patterns):
+        """
+        Find the block of sorted suffixes starting with each pattern.
+        """
+        lo = np.zeros(len(patterns), dtype=np.int64)
+        hi = np.full(len(patterns), len(self.suffixes), dtype=np.int64)
+
+        start, upper = self._bisect(patterns, lo, hi, side="left")
+        stop, _ = self._bisect(patterns, start, upper, side="right")
+        return start, stop
+
+    def lookup(self, values):
+        """
+        Find all (left, right) pairs of positions where the right string
+        contains the left string.
+
+        Parameters
+        ----------
+        values : pandas.Series
+            the left substrings to look up
+
+        Returns
+        -------
+        left_pos, right_pos : numpy.ndarray
+            the positions of the matched pairs, sorted by left and then
+            right position
+        """
+        valid, codes, patterns = _factorize_only_strings(values)
+
+        # the empty string is contained in every string
+        lengths = np.array([len(p) for p in patterns], dtype=np.int64)
+        empty = np.flatnonzero(lengths == 0)
+        n_strings = len(self.counts)
+        pattern_ids = [np.repeat(empty, n_strings)]
+        string_ids = [np.tile(np.arange(n_strings), len(empty))]
+
+        # the block of suffixes starting with each searchable pattern
+        searchable = np.flatnonzero((lengths > 0) & (lengths <= self.depth))
+        starts, stops = self._search(patterns[searchable])
+        counts = stops - starts
+        found = self.suffixes[_expand_ranges(starts, counts)]
+        found_ids = np.repeat(searchable, counts)
+
+        # map each occurrence to its string, dropping any spanning a separator
+        strings = np.searchsorted(self.offsets, found, side="right") - 1
+        inside = found + lengths[found_ids] <= self.ends[strings]
+        pattern_ids.append(found_ids[inside])
+        string_ids.append(strings[inside])
+
+        # the distinct (pattern, string) pairs
+        pairs = np.unique(
+            np.concatenate(pattern_ids) * max(n_strings, 1) + np.concatenate(string_ids)
+        )
+        pattern_ids, string_ids = np.divmod(pairs, max(n_strings, 1))
+
+        # expand the distinct pairs to left and right positions
+        return _expand_pairs(
+            _group_positions(codes, len(patterns), valid),
+            (self.positions, self.starts, self.counts),
+            pattern_ids,
+            string_ids,
+        )
+
+
+def _exact_matches(
+    left_values, right, right_on, index=None, how="exact", profiler=None
+):
+    """
+    Internal function to match the input left strings to the right data.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns
+    """
+    if how == "exact":
+        comparison = _HashIndex
+    elif how == "contains":
+        comparison = _SubstringIndex
+    elif how == "startswith":
+        comparison = _PrefixIndex
+    else:
+        raise ValueError("how should be one of: 'exact', 'contains', 'startswith'")
+
+    if profiler is None:
+        profiler = _Profile()
+
+    # index the right strings once and look up all left strings
+    if index is not None:
+        lookup = index.build(how)
+    else:
+        lookup = comparison(right[right_on])
+    profiler.lap("index")
+    left_pos, right_pos = lookup.lookup(left_values)
+    profiler.lap("lookup")
+
+    profiler.count(
+        left_rows=len(left_values), right_rows=len(right), matches=len(left_pos)
+    )
+
+    return pd.DataFrame({"left_pos": left_pos, "right_pos": right_pos})
 
 
 @pipeable
 def exact_merge(
     left: pd.DataFrame,
-    right: pd.DataFrame,
+    right: Union[pd.DataFrame, MatchIndex],
     on: str = None,
     left_on: str = None,
     right_on: str = None,
     how: str = "exact",
     suffixes=("_x", "_y"),
+    profile: bool = False,
 ):
     """
     Merge two dataframes based on two string columns and the specified matching
@@ -22,7 +531,7 @@ def exact_merge(
 
     Notes
     -----
-    -   This performs a "left" merge — all rows in the left data frame will be 
+    -   This performs a "left" merge — all rows in the left data frame will be
         present in the returned data frame
     -   Data in the left data frame can match multiple values in the right column.
 
@@ -31,8 +540,8 @@ def exact_merge(
     ----------
     left : pandas.DataFrame
         the left data to merge
-    right : pandas.DataFrame
-        the right DataFrame to merge
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
     on : str, optional
         the column to merge on
     left_on : str, optional
@@ -45,6 +554,10 @@ def exact_merge(
         Suffix to apply to overlapping column names in the left and right
         side, respectively. To raise an exception on overlapping columns use
         (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
 
     Returns
     -------
@@ -55,6 +568,9 @@ def exact_merge(
     if on is not None:
         left_on = right_on = on
 
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
+
     # Verify input parameters
     if left_on is None or right_on is None:
         raise ValueError("Please specify `on` or `left_on/right_on`")
@@ -63,39 +579,27 @@ def exact_merge(
     if right_on not in right.columns:
         raise ValueError(f"'{right_on}' is not a column in `right`")
 
-    def contains(row, right):
-        return right.loc[
-            right[right_on].str.contains(row[left_on], na=False, regex=False)
-        ]
-
-    def exact(row, right):
-        return right.loc[right[right_on] == row[left_on]]
-
-    def startswith(row, right):
-        return right.loc[right[right_on].str.startswith(row[left_on], na=False)]
-
-    if how == "exact":
-        comparison = exact
-    elif how == "contains":
-        comparison = contains
-    elif how == "startswith":
-        comparison = startswith
-    else:
-        raise ValueError("how should be one of: 'exact', 'contains', 'startswith'")
+    # get the matches
+    profiler = _Profile()
+    matches = _exact_matches(
+        left[left_on], right, right_on, index, how=how, profiler=profiler
+    )
 
     # rename the index
     right = right.rename_axis("right_index").reset_index()
-
-    merged = pd.concat(
-        left.apply(
-            lambda row: comparison(row, right).assign(index_left=row.name), axis=1
-        ).tolist()
+    merged = right.iloc[matches["right_pos"]].assign(
+        index_left=left.index[matches["left_pos"]]
     )
-    return left.merge(
+
+    merged = left.merge(
         merged.set_index("index_left"),
         left_index=True,
         right_index=True,
         how="left",
         suffixes=suffixes,
     )
+    profiler.lap("merge")
 
+    if profile:
+        profiler.attach(merged, "exact_merge")
+    return merged
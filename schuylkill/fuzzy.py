@@ -1,53 +1,597 @@
+import heapq
 import multiprocessing
+import pickle
+from collections import Counter
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+from typing import Union
 
 import numpy as np
 import pandas as pd
-from fuzzywuzzy import fuzz, process
+from fuzzywuzzy import fuzz, process, utils
+from Levenshtein import ratio as _levenshtein_ratio
+from sklearn.feature_extraction.text import CountVectorizer
 
-from .utils import pipeable
+from .cache import MatchCache, _cached_matches, _context
+from .exact import _broadcast_matches
+from .index import MatchIndex, _unpack_index
+from .utils import (
+    _block_codes,
+    _block_groups,
+    _block_strings,
+    _Profile,
+    _factorize_sides,
+    pipeable,
+)
 
+# the shared data loaded by each worker process, keyed by memory block
+_shared = {}
 
-def _apply_df(args):
-    df, func, kwargs = args
-    return df.apply(func, **kwargs)
+
+def _apply_chunk(args):
+    """
+    Apply a function to a chunk of values in a worker process, loading the
+    shared data from its memory block on first use.
+    """
+    name, size, func, values, kwargs = args
+    if name not in _shared:
+        _shared.clear()
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            _shared[name] = pickle.loads(block.buf[:size])
+        finally:
+            block.close()
+
+    return [func(value, **_shared[name], **kwargs) for value in values]
 
 
-def _apply_by_multiprocessing(df, func, workers=4, **kwargs):
+class WorkerPool:
     """
-    Internal function to apply a function to a dataframe using
+    A persistent pool of worker processes for :func:`fuzzy_merge`.
+
+    Pass the pool as the `workers` argument to reuse the same processes
+    across several merges. For each merge, the right data is copied once
+    into shared memory and loaded once by each worker, and the left strings
+    are streamed to the workers in small chunks as they become free.
+
+    Parameters
+    ----------
+    workers : int, optional
+        the number of processes to start
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+
+        # share the resource tracker, so the workers don't clean up the
+        # memory blocks created by this process
+        resource_tracker.ensure_running()
+        self._pool = multiprocessing.Pool(processes=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        self._pool.terminate()
+        self._pool.join()
+
+    def map(self, func, values, data, **kwargs):
+        """
+        Apply a function to each of the input values in parallel.
+
+        Parameters
+        ----------
+        func : callable
+            the function, called as ``func(value, **data, **kwargs)``
+        values : sequence
+            the values to apply the function to
+        data : dict
+            the (large) keyword arguments shared by all calls, sent to the
+            workers through shared memory
+        **kwargs
+            any other keyword arguments for the function
+
+        Returns
+        -------
+        results : list
+            the result for each value, in order
+        """
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        block = shared_memory.SharedMemory(create=True, size=max(len(payload), 1))
+        try:
+            block.buf[: len(payload)] = payload
+
+            # small chunks balance the load across the workers
+            size = max(1, len(values) // (self.workers * 8))
+            chunks = [
+                (block.name, len(payload), func, values[i : i + size], kwargs)
+                for i in range(0, len(values), size)
+            ]
+            return [
+                result
+                for results in self._pool.imap(_apply_chunk, chunks)
+                for result in results
+            ]
+        finally:
+            block.close()
+            block.unlink()
+
+
+def _apply_by_multiprocessing(values, func, data, workers=4, **kwargs):
+    """
+    Internal function to apply a function to each of the input values using
     multiprocessing.
     """
-    # map the function in parallel
-    with multiprocessing.Pool(processes=workers) as pool:
-        result = pool.map(
-            _apply_df, [(d, func, kwargs) for d in np.array_split(df, workers)]
-        )
+    if isinstance(workers, WorkerPool):
+        return workers.map(func, values, data, **kwargs)
+    if workers <= 1:
+        return [func(value, **data, **kwargs) for value in values]
+
+    with WorkerPool(workers) as pool:
+        return pool.map(func, values, data, **kwargs)
+
+
+def _qgrams(string, q=3):
+    """
+    Calculate the q-grams of the input string, padded at both ends so that
+    every character appears in q of them.
+    """
+    string = "\0" * (q - 1) + string + "\0" * (q - 1)
+    return [string[i : i + q] for i in range(len(string) - q + 1)]
+
+
+class _QgramIndex:
+    """
+    An inverted index from q-grams to the right strings containing them,
+    used to generate candidate matches for :func:`fuzz.ratio`.
+
+    A candidate must share enough q-grams with the query to possibly score
+    above the cutoff: a ratio of at least ``t`` between strings of length
+    ``la`` and ``lb`` allows an indel distance of at most ``d = (1 - t)(la +
+    lb)``, and each insertion or deletion changes at most ``q`` of the
+    ``max(la, lb) + q - 1`` padded q-grams. Only the postings of the rarest
+    query q-grams are probed, since a string sharing none of them can't
+    reach the required count. The filter never drops a match.
+
+    The candidates are then scored directly against the processed right
+    strings, giving the same matches as :func:`process.extractBests` over
+    all of the right strings.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        the right strings to index
+    q : int, optional
+        the length of the q-grams
+    """
+
+    def __init__(self, values, q=3):
+        processed = [utils.full_process(v) for v in values]
+        self.q = q
+        self.strings = processed
+        self.lengths = np.array([len(v) for v in processed], dtype=np.int64)
+
+        # the q-gram counts of each right string, indexed by q-gram
+        vectorizer = CountVectorizer(analyzer=partial(_qgrams, q=q))
+        self.counts = vectorizer.fit_transform(processed).tocsr()
+        self.postings = self.counts.T.tocsr()
+        self.vocabulary = vectorizer.vocabulary_
+
+        # the right strings sorted by length
+        self.by_length = np.argsort(self.lengths, kind="stable")
+        self.sorted_lengths = self.lengths[self.by_length]
+
+    def _with_lengths(self, lo, hi):
+        """
+        Return the positions of the right strings with lengths in [lo, hi].
+        """
+        start = np.searchsorted(self.sorted_lengths, lo, side="left")
+        stop = np.searchsorted(self.sorted_lengths, hi, side="right")
+        return self.by_length[start:stop]
+
+    def candidates(self, x, score_cutoff):
+        """
+        Return the positions of the right strings that can match the input
+        string with a :func:`fuzz.ratio` score of at least `score_cutoff`,
+        in ascending order.
+        """
+        x = utils.full_process(x)
+        la, q = len(x), self.q
+
+        # empty strings only match other empty strings
+        if la == 0:
+            return np.sort(self._with_lengths(0, 0))
+
+        # the minimum ratio, allowing for rounding of the score
+        t = (score_cutoff - 0.5) / 100
+
+        # the lengths that allow a ratio of at least t
+        lo = max(int(np.ceil(la * t / (2 - t) - 1e-9)), 1)
+        hi = int(np.floor(la * (2 - t) / t + 1e-9))
+
+        def min_shared(lb):
+            max_dist = np.floor((1 - t) * (la + lb) + 1e-9)
+            return np.maximum(la, lb) + q - 1 - q * max_dist
+
+        # strings of lengths where the filter can't prune anything
+        lengths = np.arange(lo, hi + 1)
+        unfiltered = lengths[min_shared(lengths) <= 0]
+        found = [self._with_lengths(lb, lb) for lb in unfiltered]
+
+        # the query q-grams in the vocabulary, rarest first
+        postings, indptr = self.postings, self.postings.indptr
+        qgrams = Counter(_qgrams(x, q))
+        known = [
+            (self.vocabulary[g], c) for g, c in qgrams.items() if g in self.vocabulary
+        ]
+        filtered = lengths[min_shared(lengths) > 0]
+        if known and len(filtered):
+            ids, weights = np.array(known, dtype=np.int64).T
+            order = np.argsort(indptr[ids + 1] - indptr[ids], kind="stable")
+            ids, weights = ids[order], weights[order]
+
+            # a string sharing none of the rarest q-grams covering more than
+            # (total - threshold) of the query can't share enough q-grams
+            total = la + q - 1
+            threshold = min_shared(filtered).min()
+            probed = np.searchsorted(
+                total - weights.sum() + np.cumsum(weights),
+                total - threshold,
+                side="right",
+            )
+            found_ids = np.unique(
+                np.concatenate(
+                    [
+                        postings.indices[indptr[j] : indptr[j + 1]]
+                        for j in ids[: probed + 1]
+                    ]
+                )
+            )
+
+            # count the q-grams actually shared with each probed string
+            rows = self.counts[found_ids]
+            order = np.argsort(ids)
+            ids, weights = ids[order], weights[order]
+            pos = np.minimum(np.searchsorted(ids, rows.indices), len(ids) - 1)
+            common = np.where(
+                ids[pos] == rows.indices, np.minimum(rows.data, weights[pos]), 0
+            )
+            shared = np.bincount(
+                np.repeat(np.arange(len(found_ids)), np.diff(rows.indptr)),
+                weights=common,
+                minlength=len(found_ids),
+            )
+
+            # keep the strings sharing enough q-grams
+            lb = self.lengths[found_ids]
+            keep = (lb >= lo) & (lb <= hi) & (shared >= min_shared(lb))
+            found.append(found_ids[keep])
+
+        return np.unique(np.concatenate(found)) if found else np.array([], dtype=int)
+
+    def extract(self, x, score_cutoff, limit=10):
+        """
+        Return the best matches for the input string with a :func:`fuzz.ratio`
+        score of at least `score_cutoff`, along with the number of candidates
+        scored.
 
-    # return the combined results
-    return pd.concat(list(result))
+        The matches are the (score, position) of the right strings, ordered
+        as :func:`process.extractBests` would order them.
+        """
+        positions = self.candidates(x, score_cutoff)
+        x = utils.full_process(x)
 
+        scored = []
+        for pos in positions:
+            score = _ratio(x, self.strings[pos])
+            if score >= score_cutoff:
+                scored.append((score, pos))
 
-def _find_matches(x, right_data, score_cutoff, scorer=fuzz.ratio, limit=10):
+        # ties are kept in order of position
+        return heapq.nlargest(limit, scored, key=lambda m: m[0]), len(positions)
+
+
+def _ratio(s1, s2):
     """
-    Use fuzzywuzzy to find the best matches.
+    Return :func:`fuzz.ratio` for two processed strings, without the
+    overhead of its argument checks and matcher object.
+    """
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    return int(round(100 * _levenshtein_ratio(s1, s2)))
+
+
+def _find_matches(
+    x, right_data, score_cutoff, scorer=fuzz.ratio, limit=10, qgrams=None
+):
     """
-    return process.extractBests(
+    Use fuzzywuzzy to find the best matches, scoring only the candidates
+    from the q-gram index, if provided.
+
+    Returns
+    -------
+    matches : list of tuple
+        the (string, score, key) of the best matches
+    candidates : int
+        the number of right strings scored
+    """
+    if qgrams is not None:
+        found, candidates = qgrams.extract(x, score_cutoff, limit=limit)
+        matches = [
+            (right_data.iat[pos], score, right_data.index[pos]) for score, pos in found
+        ]
+        return matches, candidates
+
+    matches = process.extractBests(
         x, right_data, limit=limit, score_cutoff=score_cutoff, scorer=scorer
     )
+    return matches, len(right_data)
+
+
+def _match_block(
+    block, left_unique, right_unique, score_cutoff, scorer=fuzz.ratio, limit=10
+):
+    """
+    Find the best matches of the distinct left strings of a block among the
+    distinct right strings of the same block.
+
+    Returns
+    -------
+    matches : list of tuple
+        the (left code, right code, score) of the matches
+    candidates : int
+        the number of pairs of strings scored
+    """
+    left_codes, right_codes = block
+    right_data = pd.Series(right_unique[right_codes], index=right_codes, dtype=object)
+
+    # only score plausible candidates, if there is a lossless filter
+    qgrams = None
+    if scorer is fuzz.ratio and score_cutoff > 0 and len(right_codes):
+        qgrams = _QgramIndex(right_data.values)
+
+    matches, candidates = [], 0
+    for left_code in left_codes:
+        matched, scored = _find_matches(
+            left_unique[left_code],
+            right_data,
+            score_cutoff,
+            scorer=scorer,
+            limit=limit,
+            qgrams=qgrams,
+        )
+        matches += [(left_code, right_code, score) for _, score, right_code in matched]
+        candidates += scored
+
+    return matches, candidates
+
+
+def _scorer_key(scorer):
+    """
+    Return the name identifying the input scorer in the cache.
+    """
+    name = getattr(scorer, "__qualname__", "<unnamed>")
+    if "<" in name:
+        raise ValueError("only scorers defined at module level can be cached")
+    return f"{scorer.__module__}.{name}"
+
+
+def _merge_matches(left, right, matches, suffixes):
+    """
+    Internal function to merge the matched left and right rows, with the
+    match probability, keeping all rows in `left`.
+    """
+    matches = matches.set_index(left.index[matches["left_pos"]])
+
+    matches = (
+        pd.merge(
+            left.loc[matches.index]
+            .assign(
+                right_index=right.index[matches["right_pos"]],
+                match_probability=matches["match_probability"].values,
+            )
+            .rename_axis("left_index")
+            .reset_index()
+            .set_index("right_index"),
+            right,
+            left_index=True,
+            right_index=True,
+            suffixes=suffixes,
+        )
+        .rename_axis("right_index")
+        .reset_index()
+        .set_index("left_index")
+        .sort_index()
+    )
+
+    # the rows from the left dataframe that are unmatched
+    unmatched = left.loc[left.index.difference(matches.index)]
+
+    # rename any intersecting columns
+    intersecting = left.columns.intersection(right.columns)
+    for col in intersecting:
+        unmatched = unmatched.rename(columns={col: f"{col}{suffixes[0]}"})
+
+    # the name of the right columns, with suffixes
+    right_cols = [
+        col if col not in intersecting else f"{col}{suffixes[1]}"
+        for col in right.columns
+    ]
+
+    # return all the data, with columns in the proper order
+    out = pd.concat([matches, unmatched], sort=False).sort_index()
+    return out.loc[
+        :, list(unmatched.columns) + ["match_probability", "right_index"] + right_cols
+    ]
+
+
+def _fuzzy_matches(
+    left_values,
+    right,
+    right_on,
+    index=None,
+    workers=4,
+    score_cutoff=90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+    cache=None,
+    left_blocks=None,
+    right_blocks=None,
+    profiler=None,
+):
+    """
+    Internal function to match the input left strings to the right data,
+    only within the same block if the block codes of the left and right
+    rows are given.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if cache is not None and left_blocks is not None:
+        raise ValueError("the `cache` can't be used when matching within blocks")
+
+    if profiler is None:
+        profiler = _Profile()
+
+    # the distinct left and right strings
+    left_side, right_side = _factorize_sides(left_values, right, right_on, index)
+    left_pos, left_codes, left_unique = left_side
+    right_pos, right_codes, right_unique = right_side
+
+    # match each distinct (block, string) pair as a separate string
+    if left_blocks is not None:
+        left_pos, left_codes, left_strings, left_pair_blocks = _block_strings(
+            left_pos, left_codes, left_unique, left_blocks
+        )
+        right_pos, right_codes, right_strings, right_pair_blocks = _block_strings(
+            right_pos, right_codes, right_unique, right_blocks
+        )
+        left_unique, right_unique = (
+            left_unique[left_strings],
+            right_unique[right_strings],
+        )
+    profiler.lap("factorize")
+
+    candidates = 0
+
+    def match_blocks():
+        nonlocal candidates
+
+        # get the fuzzy matches within each block
+        blocks = _block_groups(left_pair_blocks, right_pair_blocks)
+        block_matches = _apply_by_multiprocessing(
+            blocks,
+            _match_block,
+            dict(left_unique=left_unique, right_unique=right_unique),
+            workers=workers,
+            score_cutoff=score_cutoff,
+            scorer=scorer,
+            limit=max_matches,
+        )
+        candidates = sum(scored for _, scored in block_matches)
+        profiler.count(blocks=len(blocks))
+        return pd.DataFrame(
+            [match for matched, _ in block_matches for match in matched],
+            columns=["left_code", "right_code", "score"],
+        )
+
+    def match(positions):
+        nonlocal candidates
+
+        # only score plausible candidates, if there is a lossless filter
+        qgrams = None
+        if scorer is fuzz.ratio and score_cutoff > 0 and len(right_unique):
+            if index is not None:
+                qgrams = index.build("fuzzy")
+            else:
+                qgrams = _QgramIndex(right_unique)
+        profiler.lap("index")
+
+        # get the fuzzy matches for each distinct left string
+        fuzzy_matches = _apply_by_multiprocessing(
+            left_unique[positions],
+            _find_matches,
+            dict(right_data=pd.Series(right_unique, dtype=object), qgrams=qgrams),
+            workers=workers,
+            score_cutoff=score_cutoff,
+            scorer=scorer,
+            limit=max_matches,
+        )
+        candidates = sum(scored for _, scored in fuzzy_matches)
+        return pd.DataFrame(
+            [
+                (left_code, right_code, score)
+                for left_code, (matched, _) in zip(positions, fuzzy_matches)
+                for _, score, right_code in matched
+            ],
+            columns=["left_code", "right_code", "score"],
+        )
+
+    # match the distinct left strings missing from the cache
+    context = None
+    if cache is not None:
+        context = _context(
+            "fuzzy",
+            right_unique,
+            scorer=_scorer_key(scorer),
+            score_cutoff=score_cutoff,
+            max_matches=max_matches,
+        )
+    if left_blocks is not None:
+        found, hits = match_blocks(), 0
+    else:
+        found, hits = _cached_matches(cache, context, left_unique, match)
+    profiler.lap("score")
+
+    # broadcast the matches back to the left and right rows
+    matches = _broadcast_matches(
+        found, left_pos, left_codes, right_pos, right_codes, max_matches
+    )
+    profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left_values),
+        left_unique=len(left_unique),
+        right_rows=len(right),
+        right_unique=len(right_unique),
+        candidate_pairs=candidates,
+        cache_hits=hits,
+        matched_pairs=len(found),
+        matches=len(matches),
+    )
+    return matches
 
 
 @pipeable
 def fuzzy_merge(
     left: pd.DataFrame,
-    right: pd.DataFrame,
-    on: str = None,
-    left_on: str = None,
-    right_on: str = None,
-    workers: int = 4,
+    right: Union[pd.DataFrame, MatchIndex],
+    on: Union[str, list] = None,
+    left_on: Union[str, list] = None,
+    right_on: Union[str, list] = None,
+    workers: Union[int, WorkerPool] = 4,
     score_cutoff: int = 90,
     scorer=fuzz.ratio,
     max_matches=1,
+    cache: MatchCache = None,
+    by: Union[str, list] = None,
+    left_by: Union[str, list] = None,
+    right_by: Union[str, list] = None,
+    weights: list = None,
+    max_candidates: int = 10,
     suffixes=("_x", "_y"),
+    profile: bool = False,
 ):
     """
     Merge two dataframes based on a fuzzy matching between two string columns.
@@ -62,26 +606,49 @@ def fuzzy_merge(
     ----------
     left : pandas.DataFrame
         the left data to merge
-    right : pandas.DataFrame
-        the right DataFrame to merge
-    on : str, optional
-        the column to merge on
-    left_on : str, optional
-        the name of the string column in the left data frame to merge on
-    right_on : str, optional
-        the name of the string column in the right data frame to merge on
-    workers : int, optional
-        the number of processes to apply
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    on : str or list of str, optional
+        the column(s) to merge on
+    left_on : str or list of str, optional
+        the name(s) of the string column(s) in the left data frame to merge on
+    right_on : str or list of str, optional
+        the name(s) of the string column(s) in the right data frame to merge on
+    workers : int or WorkerPool, optional
+        the number of processes to apply, or a pool of processes to reuse
     score_cutoff : int, optional
         only match strings that score above this threshold
     scorer : callable, optional
         the fuzzywuzzy function to use to score the matches
     max_matches : int, optional
         the maximum number of matches to identify per row
+    cache : MatchCache, optional
+        a persistent cache of the matches of distinct left strings; only the
+        strings missing from it are matched
+    by : str or list of str, optional
+        the blocking column(s); only rows with the same values in these
+        columns are matched, and each block is matched separately, in
+        parallel across the `workers`
+    left_by : str or list of str, optional
+        the blocking column(s) in the left data frame
+    right_by : str or list of str, optional
+        the blocking column(s) in the right data frame
+    weights : list of float, optional
+        when merging on several columns, the weight of each column in the
+        match probability, which is the weighted mean of the similarities of
+        the columns; by default, the columns are weighted equally
+    max_candidates : int, optional
+        when merging on several columns, the number of the most similar
+        right strings, in the column with the most distinct right strings,
+        to consider as candidate matches for each left string
     suffixes : tuple of (str, str), default ('_x', '_y')
         Suffix to apply to overlapping column names in the left and right
         side, respectively. To raise an exception on overlapping columns use
         (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
 
     Returns
     -------
@@ -91,99 +658,71 @@ def fuzzy_merge(
     """
     if on is not None:
         left_on = right_on = on
+    if by is not None:
+        left_by = right_by = by
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
 
     # Verify input parameters
     if left_on is None or right_on is None:
         raise ValueError("Please specify `on` or `left_on/right_on`")
-    if left_on not in left.columns:
+    multi = isinstance(left_on, list) or isinstance(right_on, list)
+    if not multi and left_on not in left.columns:
         raise ValueError(f"'{left_on}' is not a column in `left`")
-    if right_on not in right.columns:
+    if not multi and right_on not in right.columns:
         raise ValueError(f"'{right_on}' is not a column in `right`")
+    if multi and (cache is not None or left_by is not None or right_by is not None):
+        raise ValueError(
+            "`cache` and `by` can't be used when merging on several columns"
+        )
 
     # Make sure no duplicates in left index
     if left.index.duplicated().sum():
         raise ValueError("`left` dataframe has duplicate indices")
 
-    # get the left and right strings
-    left_data = left[left_on].dropna().astype(str)
-    right_data = right[right_on].dropna().astype(str).rename_axis("right_index")
+    # the blocks of the left and right rows
+    left_blocks = right_blocks = None
+    if left_by is not None or right_by is not None:
+        left_blocks, right_blocks = _block_codes(left, right, left_by, right_by)
 
-    # get the fuzzy matches
-    fuzzy_matches = (
-        _apply_by_multiprocessing(
-            left_data,
-            _find_matches,
-            right_data=right_data,
+    # get the matches
+    profiler = _Profile()
+    if multi:
+        from .multi import _multi_matches
+
+        matches = _multi_matches(
+            left,
+            right,
+            left_on,
+            right_on,
+            "fuzzy",
+            weights=weights,
             score_cutoff=score_cutoff,
-            workers=workers,
+            max_matches=max_matches,
+            max_candidates=max_candidates,
             scorer=scorer,
-            limit=max_matches,
-        )
-        .reindex(left.index)
-        .rename_axis("left_index")
-        .reset_index()
-    )
-
-    # unstack the matches
-    unstacked = (
-        fuzzy_matches.apply(lambda x: pd.Series(x[left_data.name], dtype=object), axis=1)
-        .stack()
-        .reset_index(level=1, drop=True)
-    )
-
-    # join the matches
-    matches = (
-        fuzzy_matches.drop(left_data.name, axis=1)
-        .join(
-            pd.DataFrame(
-                unstacked.tolist(),
-                columns=[right_data.name, "score", "right_index"],
-                index=unstacked.index,
-            ),
-            lsuffix=suffixes[0],
-            rsuffix=suffixes[1],
+            workers=workers,
+            profiler=profiler,
         )
-        .set_index("left_index")
-        .dropna()
-    )
-
-    matches = (
-        pd.merge(
-            left.loc[matches.index]
-            .assign(
-                right_index=matches.right_index.values,
-                match_probability=matches.score.values / 100.0,
-            )
-            .rename_axis("left_index")
-            .reset_index()
-            .set_index("right_index"),
+    else:
+        matches = _fuzzy_matches(
+            left[left_on],
             right,
-            left_index=True,
-            right_index=True,
-            suffixes=suffixes,
+            right_on,
+            index,
+            workers=workers,
+            score_cutoff=score_cutoff,
+            scorer=scorer,
+            max_matches=max_matches,
+            cache=cache,
+            left_blocks=left_blocks,
+            right_blocks=right_blocks,
+            profiler=profiler,
         )
-        .rename_axis("right_index")
-        .reset_index()
-        .set_index("left_index")
-        .sort_index()
-    )
-
-    # the rows from the left dataframe that are unmatched
-    unmatched = left.loc[left.index.difference(matches.index)]
-
-    # rename any intersecting columns
-    intersecting = left.columns.intersection(right.columns)
-    for col in intersecting:
-        unmatched = unmatched.rename(columns={col: f"{col}{suffixes[0]}"})
-
-    # the name of the right columns, with suffixes
-    right_cols = [
-        col if col not in intersecting else f"{col}{suffixes[1]}"
-        for col in right.columns
-    ]
+    out = _merge_matches(left, right, matches, suffixes)
+    profiler.lap("merge")
 
-    # return all the data, with columns in the proper order
-    out = pd.concat([matches, unmatched], sort=False).sort_index()
-    return out.loc[
-        :, list(unmatched.columns) + ["match_probability", "right_index"] + right_cols
-    ]
+    if profile:
+        profiler.attach(out, "fuzzy_merge")
+    return out
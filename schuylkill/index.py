@@ -0,0 +1,330 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .utils import _factorize_strings
+
+__all__ = ["MatchIndex"]
+
+
+def _builders():
+    """
+    The functions building the lookup structure for each merge method.
+    """
+    from .exact import _HashIndex, _PrefixIndex, _SubstringIndex
+    from .fuzzy import _QgramIndex
+    from .minhash import _MinHashIndex
+    from .tf_idf import _TfidfIndex
+    from .tokens import _TokenIndex
+
+    return {
+        "exact": lambda index: _HashIndex(index.right[index.on]),
+        "startswith": lambda index: _PrefixIndex(index.right[index.on]),
+        "contains": lambda index: _SubstringIndex(index.right[index.on]),
+        "fuzzy": lambda index: _QgramIndex(index.uniques),
+        "minhash": lambda index: _MinHashIndex(index.uniques),
+        "tf_idf": lambda index: _TfidfIndex(
+            index.uniques, np.bincount(index.codes, minlength=len(index.uniques))
+        ),
+        "token": lambda index: _TokenIndex(index.uniques),
+    }
+
+
+class _ArrayPickler(pickle.Pickler):
+    """
+    A pickler that stores numeric arrays as separate ``.npy`` files, so
+    that they can be memory-mapped when loading.
+    """
+
+    def __init__(self, file, directory):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.directory = directory
+        self.count = 0
+
+    def persistent_id(self, obj):
+        if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+            filename = f"{self.count}.npy"
+            np.save(os.path.join(self.directory, filename), obj)
+            self.count += 1
+            return filename
+        return None
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """
+    An unpickler loading the arrays stored by :class:`_ArrayPickler`.
+    """
+
+    def __init__(self, file, directory, mmap_mode=None):
+        super().__init__(file)
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+
+    def persistent_load(self, pid):
+        return np.load(os.path.join(self.directory, pid), mmap_mode=self.mmap_mode)
+
+
+class MatchIndex:
+    """
+    A reusable index of the strings in a right data frame.
+
+    The index can be passed to :func:`exact_merge`, :func:`fuzzy_merge`,
+    :func:`minhash_merge`, :func:`tf_idf_merge` and :func:`token_merge` in
+    place of the `right` data frame. The lookup structure for each merge
+    method is built on first use (or up front via `methods`) and kept for
+    later merges, and the whole index can be saved to disk and loaded again.
+
+    Parameters
+    ----------
+    right : pandas.DataFrame
+        the right DataFrame to index
+    on : str
+        the name of the string column in `right` to merge on
+    methods : list of str, optional
+        the lookup structures to build immediately, any of 'exact',
+        'startswith', 'contains', 'fuzzy', 'minhash', 'tf_idf', or 'token'
+    """
+
+    def __init__(self, right, on, methods=()):
+        if on not in right.columns:
+            raise ValueError(f"'{on}' is not a column in `right`")
+
+        self.right = right
+        self.on = on
+        self.positions, self.codes, self.uniques = _factorize_strings(right[on])
+        self._structures = {}
+
+        for method in methods:
+            self.build(method)
+
+    def build(self, method):
+        """
+        Return the lookup structure for the input merge method, building
+        it if necessary.
+
+        Parameters
+        ----------
+        method : str
+            one of 'exact', 'startswith', 'contains', 'fuzzy', 'minhash',
+            'tf_idf', or 'token'
+        """
+        builders = _builders()
+        if method not in builders:
+            raise ValueError(f"method should be one of: {', '.join(builders)}")
+
+        if method not in self._structures:
+            self._structures[method] = builders[method](self)
+        return self._structures[method]
+
+    def _update(self, right, positions, codes, uniques, idf_tolerance, **kwargs):
+        """
+        Replace the indexed data, updating the TF-IDF structure in place
+        and dropping the other lookup structures, to be rebuilt on next use.
+        """
+        self.right = right
+        self.positions, self.codes, self.uniques = positions, codes, uniques
+
+        tf_idf = self._structures.get("tf_idf")
+        self._structures = {}
+        if tf_idf is not None:
+            tf_idf.update(
+                np.bincount(codes, minlength=len(uniques)),
+                idf_tolerance=idf_tolerance,
+                **kwargs,
+            )
+            self._structures["tf_idf"] = tf_idf
+
+    def append(self, rows, idf_tolerance=0.1):
+        """
+        Add new rows to the right data.
+
+        The TF-IDF structure is updated for the new strings only, without
+        refitting; any other lookup structures are rebuilt on next use.
+
+        Parameters
+        ----------
+        rows : pandas.DataFrame
+            the rows to add, with the same columns as the right data
+        idf_tolerance : float, optional
+            the TF-IDF weights of all the strings are recalculated if the
+            number of right rows has changed by more than this fraction
+            since they were last calculated; use 0 to always recalculate them
+        """
+        if self.on not in rows.columns:
+            raise ValueError(f"'{self.on}' is not a column in `rows`")
+        if rows.index.isin(self.right.index).any():
+            raise ValueError("`rows` has indices already in the right data")
+
+        # the codes of the new strings, with new distinct strings at the end
+        positions, codes, uniques = _factorize_strings(rows[self.on])
+        unique_codes = pd.Index(self.uniques).get_indexer(uniques)
+        new_codes, new_uniques = pd.factorize(uniques[unique_codes < 0])
+        unique_codes[unique_codes < 0] = new_codes + len(self.uniques)
+        codes = unique_codes[codes]
+
+        self._update(
+            pd.concat([self.right, rows]),
+            np.concatenate([self.positions, positions + len(self.right)]),
+            np.concatenate([self.codes, codes]),
+            np.concatenate([self.uniques, new_uniques]),
+            idf_tolerance,
+            values=new_uniques,
+        )
+
+    def drop(self, labels, idf_tolerance=0.1):
+        """
+        Remove rows from the right data.
+
+        The TF-IDF structure is updated without refitting; any other lookup
+        structures are rebuilt on next use.
+
+        Parameters
+        ----------
+        labels : list-like
+            the index labels of the rows to remove
+        idf_tolerance : float, optional
+            the TF-IDF weights of all the strings are recalculated if the
+            number of right rows has changed by more than this fraction
+            since they were last calculated; use 0 to always recalculate them
+        """
+        labels = pd.Index(labels)
+        if not labels.isin(self.right.index).all():
+            raise ValueError("`labels` has indices missing from the right data")
+
+        # the positions of the remaining rows after the drop
+        kept_rows = ~self.right.index.isin(labels)
+        row_positions = np.cumsum(kept_rows) - 1
+        remaining = kept_rows[self.positions]
+
+        # keep the remaining distinct strings, in order of first appearance
+        keep = pd.unique(self.codes[remaining])
+        new_codes = np.empty(len(self.uniques), dtype=self.codes.dtype)
+        new_codes[keep] = np.arange(len(keep))
+
+        self._update(
+            self.right.loc[kept_rows],
+            row_positions[self.positions[remaining]],
+            new_codes[self.codes[remaining]],
+            self.uniques[keep],
+            idf_tolerance,
+            keep=keep,
+        )
+
+    def match_many(self, values, method="exact", **kwargs):
+        """
+        Match a list of query strings to the right data.
+
+        Only the distinct queries are matched, against the lookup structures
+        kept by the index, so this is suited to matching a few strings at a
+        time with low latency.
+
+        Parameters
+        ----------
+        values : list-like of str
+            the query strings
+        method : str, optional
+            the matching method, one of 'exact', 'startswith', 'contains',
+            'fuzzy', or 'tf_idf'; queries don't support the 'minhash' and
+            'token' methods
+        **kwargs :
+            any of the `score_cutoff` and `max_matches` arguments of
+            :func:`fuzzy_merge` and :func:`tf_idf_merge`, and the `scorer`
+            of :func:`fuzzy_merge`
+
+        Returns
+        -------
+        matches : pandas.DataFrame
+            the "query", "match_probability", "right_index" and right columns
+            of each match, indexed by the position of the query; unmatched
+            queries have a single row with missing right data
+        """
+        from .query import _match_many
+
+        return _match_many(self, values, method, **kwargs)
+
+    def match_one(self, value, method="exact", **kwargs):
+        """
+        Match a single query string to the right data.
+
+        Parameters
+        ----------
+        value : str
+            the query string
+        method : str, optional
+            the matching method, one of 'exact', 'startswith', 'contains',
+            'fuzzy', or 'tf_idf'; queries don't support the 'minhash' and
+            'token' methods
+        **kwargs :
+            any additional keyword arguments for :meth:`MatchIndex.match_many`
+
+        Returns
+        -------
+        matches : pandas.DataFrame
+            the "match_probability", "right_index" and right columns of each
+            matched right row
+        """
+        from .query import _match_one
+
+        return _match_one(self, value, method, **kwargs)
+
+    def save(self, path):
+        """
+        Save the index, including any lookup structures built so far, to
+        the input directory.
+
+        Parameters
+        ----------
+        path : str
+            the directory to save to; it is created if necessary
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "index.pkl"), "wb") as f:
+            _ArrayPickler(f, path).dump(self.__dict__)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an index saved with :meth:`MatchIndex.save`.
+
+        Notes
+        -----
+        -   The index is stored with `pickle`, so only load indices from
+            trusted sources, using the same package versions that saved them.
+
+        Parameters
+        ----------
+        path : str
+            the directory the index was saved to
+        mmap : bool, optional
+            whether to memory-map the numeric arrays rather than reading
+            them into memory
+
+        Returns
+        -------
+        index : MatchIndex
+            the loaded index
+        """
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            state = _ArrayUnpickler(f, path, mmap_mode="c" if mmap else None).load()
+
+        index = cls.__new__(cls)
+        index.__dict__.update(state)
+        return index
+
+
+def _unpack_index(right, right_on):
+    """
+    Return the right data frame, the right column name and the index (or
+    None) for the `right` argument of a merge function.
+    """
+    if not isinstance(right, MatchIndex):
+        return right, right_on, None
+
+    if right_on is None:
+        right_on = right.on
+    elif right_on != right.on:
+        raise ValueError(f"'{right_on}' is not the indexed column '{right.on}'")
+
+    return right.right, right_on, right
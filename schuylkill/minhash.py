@@ -0,0 +1,439 @@
+import zlib
+from functools import lru_cache, partial
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz, process, utils
+from sklearn.feature_extraction.text import CountVectorizer
+
+from .exact import _broadcast_matches, _expand_ranges
+from .fuzzy import (
+    WorkerPool,
+    _apply_by_multiprocessing,
+    _merge_matches,
+    _qgrams,
+)
+from .index import MatchIndex, _unpack_index
+from .utils import _Profile, _factorize_sides, pipeable
+
+__all__ = ["minhash_merge"]
+
+# the modulus of the MinHash permutations (the largest 32-bit prime)
+_PRIME = np.uint64(4294967291)
+
+
+def _jaccard_threshold(score_cutoff, q=3):
+    """
+    The Jaccard similarity of the q-gram shingles that strings scoring
+    `score_cutoff` with :func:`fuzz.ratio` are expected to exceed.
+
+    Each insertion or deletion changes at most `q` q-grams, so a fraction
+    ``f = 1 - q * (1 - score_cutoff / 100)`` of the q-grams are shared, which
+    gives a Jaccard similarity of ``f / (2 - f)``.
+    """
+    shared = 1 - q * (1 - score_cutoff / 100)
+    return min(max(shared / (2 - shared), 0.1), 1.0)
+
+
+@lru_cache()
+def _lsh_params(threshold, num_perm, false_negative_weight=0.75):
+    """
+    Choose the number of bands and rows per band of the LSH index that
+    minimize the weighted probability of false positives (below the
+    threshold) and false negatives (above the threshold).
+    """
+    similarity = np.linspace(0, 1, 201)
+    below = similarity < threshold
+
+    best, params = np.inf, (num_perm, 1)
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            probability = 1 - (1 - similarity ** rows) ** bands
+            false_positive = np.trapz(probability[below], similarity[below])
+            false_negative = np.trapz(1 - probability[~below], similarity[~below])
+            error = (
+                1 - false_negative_weight
+            ) * false_positive + false_negative_weight * false_negative
+            if error < best:
+                best, params = error, (bands, rows)
+    return params
+
+
+class _MinHashIndex:
+    """
+    The MinHash signatures of the distinct right strings, over their
+    character q-gram shingles, and the LSH tables to look up candidates.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the distinct right strings to index
+    num_perm : int, optional
+        the number of hash permutations in each signature
+    q : int, optional
+        the length of the shingles
+    seed : int, optional
+        the random seed of the hash permutations
+    """
+
+    def __init__(self, values, num_perm=128, q=3, seed=1):
+        self.num_perm = num_perm
+        self.q = q
+
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self.multipliers = rng.randint(1, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.multipliers |= np.uint64(1)
+
+        self.signatures = self.transform(values)
+        self._tables = {}
+
+    def transform(self, values, batch_size=2 ** 16):
+        """
+        Calculate the MinHash signatures of the input strings, over the
+        shingles of the strings as processed by the fuzzywuzzy scorers.
+        """
+        signatures = np.zeros((len(values), self.num_perm), dtype=np.uint32)
+        if not len(values):
+            return signatures
+
+        # the hash of each distinct shingle
+        counter = CountVectorizer(analyzer=partial(_qgrams, q=self.q))
+        counts = counter.fit_transform([utils.full_process(v) for v in values])
+        counts = counts.tocsr()
+        hashes = np.zeros(len(counter.vocabulary_), dtype=np.uint64)
+        for shingle, column in counter.vocabulary_.items():
+            hashes[column] = zlib.crc32(shingle.encode("utf-8", "surrogatepass"))
+
+        # the minimum of each permutation, in batches of about `batch_size`
+        # shingle hashes
+        indptr = counts.indptr
+        rows_per_batch = max(1, batch_size * len(values) // max(counts.nnz, 1))
+        for start in range(0, len(values), rows_per_batch):
+            stop = min(start + rows_per_batch, len(values))
+            x = hashes[counts.indices[indptr[start] : indptr[stop]]]
+            permuted = (x[:, None] * self.a + self.b) % _PRIME
+            signatures[start:stop] = np.minimum.reduceat(
+                permuted, indptr[start:stop] - indptr[start], axis=0
+            )
+
+        return signatures
+
+    def _band_keys(self, signatures, bands, rows):
+        """
+        Hash each band of rows of the input signatures into a single key.
+        """
+        keys = np.empty((len(signatures), bands), dtype=np.uint64)
+        for band in range(bands):
+            columns = slice(band * rows, (band + 1) * rows)
+            keys[:, band] = (
+                signatures[:, columns].astype(np.uint64) * self.multipliers[columns]
+            ).sum(axis=1, dtype=np.uint64)
+        return keys
+
+    def _table(self, bands, rows):
+        """
+        The sorted band keys of the right strings, and the order sorting
+        them, for each band.
+        """
+        if (bands, rows) not in self._tables:
+            keys = self._band_keys(self.signatures, bands, rows)
+            order = np.argsort(keys, axis=0, kind="stable")
+            self._tables[(bands, rows)] = (
+                np.take_along_axis(keys, order, axis=0),
+                order,
+            )
+        return self._tables[(bands, rows)]
+
+    def candidates(self, signatures, threshold):
+        """
+        Find the pairs of input and right strings sharing at least one band
+        of their signatures.
+
+        Returns
+        -------
+        left_pos, right_pos : numpy.ndarray
+            the positions of the candidate pairs of input and right strings,
+            sorted by input position
+        """
+        bands, rows = _lsh_params(threshold, self.num_perm)
+        sorted_keys, order = self._table(bands, rows)
+        keys = self._band_keys(signatures, bands, rows)
+
+        n = len(self.signatures)
+        pairs = []
+        for band in range(bands):
+            starts = np.searchsorted(sorted_keys[:, band], keys[:, band], "left")
+            stops = np.searchsorted(sorted_keys[:, band], keys[:, band], "right")
+            counts = stops - starts
+            left_pos = np.repeat(np.arange(len(keys)), counts)
+            right_pos = order[_expand_ranges(starts, counts), band]
+            pairs.append(left_pos.astype(np.int64) * n + right_pos)
+
+        pairs = np.unique(np.concatenate(pairs)) if pairs else np.array([], int)
+        return pairs // max(n, 1), pairs % max(n, 1)
+
+
+def _score_candidates(item, right_data, score_cutoff, scorer=fuzz.ratio, limit=1):
+    """
+    Use fuzzywuzzy to find the best matches among the candidate right
+    strings.
+    """
+    x, candidates = item
+    return process.extractBests(
+        x,
+        right_data.iloc[candidates],
+        limit=limit,
+        score_cutoff=score_cutoff,
+        scorer=scorer,
+    )
+
+
+def _rescore_candidates(
+    left_unique,
+    right_unique,
+    candidate_left,
+    candidate_right,
+    workers=4,
+    score_cutoff=90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+):
+    """
+    Score the candidate pairs of distinct strings with fuzzywuzzy, keeping
+    the best `max_matches` candidates of each left string above the cutoff.
+
+    Parameters
+    ----------
+    candidate_left, candidate_right : numpy.ndarray
+        the codes of the candidate left and right strings, sorted by left
+        code
+
+    Returns
+    -------
+    found : pandas.DataFrame
+        the "left_code", "right_code" and "score" (from 0 to 100) of the
+        matches
+    """
+    boundaries = np.searchsorted(candidate_left, np.arange(len(left_unique) + 1))
+    fuzzy_matches = _apply_by_multiprocessing(
+        [
+            (x, candidate_right[boundaries[i] : boundaries[i + 1]])
+            for i, x in enumerate(left_unique)
+        ],
+        _score_candidates,
+        dict(right_data=pd.Series(right_unique, dtype=object)),
+        workers=workers,
+        score_cutoff=score_cutoff,
+        scorer=scorer,
+        limit=max_matches,
+    )
+    return pd.DataFrame(
+        [
+            (left_code, right_code, score)
+            for left_code, matched in enumerate(fuzzy_matches)
+            for _, score, right_code in matched
+        ],
+        columns=["left_code", "right_code", "score"],
+    )
+
+
+def _minhash_matches(
+    left_values,
+    right,
+    right_on,
+    index=None,
+    workers=4,
+    score_cutoff=90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+    rescore=True,
+    profiler=None,
+):
+    """
+    Internal function to match the input left strings to the right data.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if profiler is None:
+        profiler = _Profile()
+
+    # the distinct left and right strings
+    left_side, right_side = _factorize_sides(left_values, right, right_on, index)
+    left_pos, left_codes, left_unique = left_side
+    right_pos, right_codes, right_unique = right_side
+    profiler.lap("factorize")
+
+    # the signatures of the left and right strings
+    if index is not None:
+        minhash = index.build("minhash")
+    else:
+        minhash = _MinHashIndex(right_unique)
+    signatures = minhash.transform(left_unique)
+    profiler.lap("signatures")
+
+    # the candidate pairs of distinct strings
+    threshold = _jaccard_threshold(score_cutoff, minhash.q)
+    candidate_left, candidate_right = minhash.candidates(signatures, threshold)
+    profiler.lap("candidates")
+
+    if rescore:
+        # score the candidates of each distinct left string
+        found = _rescore_candidates(
+            left_unique,
+            right_unique,
+            candidate_left,
+            candidate_right,
+            workers=workers,
+            score_cutoff=score_cutoff,
+            scorer=scorer,
+            max_matches=max_matches,
+        )
+    else:
+        # use the estimated Jaccard similarity of the candidates
+        similarity = (
+            signatures[candidate_left] == minhash.signatures[candidate_right]
+        ).mean(axis=1)
+        keep = similarity >= threshold
+        found = pd.DataFrame(
+            {
+                "left_code": candidate_left[keep],
+                "right_code": candidate_right[keep],
+                "score": 100 * similarity[keep],
+            }
+        )
+    profiler.lap("score")
+
+    # broadcast the matches back to the left and right rows
+    matches = _broadcast_matches(
+        found, left_pos, left_codes, right_pos, right_codes, max_matches
+    )
+    profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left_values),
+        left_unique=len(left_unique),
+        right_rows=len(right),
+        right_unique=len(right_unique),
+        candidate_pairs=len(candidate_left),
+        matched_pairs=len(found),
+        matches=len(matches),
+    )
+    return matches
+
+
+@pipeable
+def minhash_merge(
+    left: pd.DataFrame,
+    right: Union[pd.DataFrame, MatchIndex],
+    on: str = None,
+    left_on: str = None,
+    right_on: str = None,
+    workers: Union[int, WorkerPool] = 4,
+    score_cutoff: int = 90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+    rescore: bool = True,
+    suffixes=("_x", "_y"),
+    profile: bool = False,
+):
+    """
+    Merge two dataframes based on an approximate fuzzy matching between two
+    string columns, using MinHash locality-sensitive hashing (LSH).
+
+    The right strings are indexed by the MinHash signatures of their
+    character 3-grams, and only the right strings sharing a band of their
+    signature with a left string are scored. The bands are chosen to
+    retrieve the strings expected to score above `score_cutoff`.
+
+    Notes
+    -----
+    -   This performs a "left" merge — all rows in the left data frame will be
+        present in the returned data frame
+    -   Data in the left data frame can match multiple values in the right column.
+    -   The matching is approximate: a few matches found by
+        :func:`fuzzy_merge` may be missed, in return for sub-linear lookups.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+        the left data to merge
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    on : str, optional
+        the column to merge on
+    left_on : str, optional
+        the name of the string column in the left data frame to merge on
+    right_on : str, optional
+        the name of the string column in the right data frame to merge on
+    workers : int or WorkerPool, optional
+        the number of processes to apply, or a pool of processes to reuse
+    score_cutoff : int, optional
+        only match strings that score above this threshold
+    scorer : callable, optional
+        the fuzzywuzzy function to use to score the matches
+    max_matches : int, optional
+        the maximum number of matches to identify per row
+    rescore : bool, optional
+        whether to score the candidates with `scorer`; if False, the match
+        probability is the estimated Jaccard similarity of the 3-grams, and
+        matches must exceed the similarity implied by `score_cutoff`
+    suffixes : tuple of (str, str), default ('_x', '_y')
+        Suffix to apply to overlapping column names in the left and right
+        side, respectively. To raise an exception on overlapping columns use
+        (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        the merged dataframe containg all rows in `left` and any matched data
+        from the `right` data frame
+    """
+    if on is not None:
+        left_on = right_on = on
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
+
+    # Verify input parameters
+    if left_on is None or right_on is None:
+        raise ValueError("Please specify `on` or `left_on/right_on`")
+    if left_on not in left.columns:
+        raise ValueError(f"'{left_on}' is not a column in `left`")
+    if right_on not in right.columns:
+        raise ValueError(f"'{right_on}' is not a column in `right`")
+
+    # Make sure no duplicates in left index
+    if left.index.duplicated().sum():
+        raise ValueError("`left` dataframe has duplicate indices")
+
+    # get the matches
+    profiler = _Profile()
+    matches = _minhash_matches(
+        left[left_on],
+        right,
+        right_on,
+        index,
+        workers=workers,
+        score_cutoff=score_cutoff,
+        scorer=scorer,
+        max_matches=max_matches,
+        rescore=rescore,
+        profiler=profiler,
+    )
+    out = _merge_matches(left, right, matches, suffixes)
+    profiler.lap("merge")
+
+    if profile:
+        profiler.attach(out, "minhash_merge")
+    return out
@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz, utils
+
+from .exact import _broadcast, _group_positions
+from .fuzzy import _fuzzy_matches
+from .tf_idf import _fast_cossim_top, _nonzero_matches, _tf_idf
+from .utils import _Profile, _factorize_strings
+
+
+def _record_codes(strings):
+    """
+    Factorize the records given by the input string codes, an array with a
+    row per column and a column per record, where missing strings are -1.
+
+    Returns
+    -------
+    codes : numpy.ndarray
+        the code of each record
+    records : numpy.ndarray
+        the string codes of each distinct record, with a row per column
+    """
+    codes = np.zeros(strings.shape[1], dtype=np.int64)
+    for column in strings:
+        codes = pd.factorize(codes * (column.max(initial=-1) + 2) + column + 1)[0]
+
+    _, first = np.unique(codes, return_index=True)
+    return codes, strings[:, first]
+
+
+def _tf_idf_vectors(left_unique, right_unique, left_strings, right_strings):
+    """
+    Fit the TF-IDF vectorization to the distinct left and right strings of a
+    column, weighting each string by its number of rows.
+
+    Returns
+    -------
+    left_matrix, right_matrix : scipy.sparse.csr_matrix
+        the normalized TF-IDF vectors of the left and right strings
+    """
+    weights = np.concatenate(
+        [
+            np.bincount(left_strings[left_strings >= 0], minlength=len(left_unique)),
+            np.bincount(right_strings[right_strings >= 0], minlength=len(right_unique)),
+        ]
+    )
+    _, _, matrix = _tf_idf(np.concatenate([left_unique, right_unique]), weights)
+    return matrix[: len(left_unique)], matrix[len(left_unique) :]
+
+
+def _tf_idf_candidates(
+    left_matrix, right_matrix, lower_bound, max_candidates, chunk_size, workers
+):
+    """
+    Find the most similar right strings of each left string, a chunk of
+    left strings at a time.
+
+    Returns
+    -------
+    left_codes, right_codes, scores : numpy.ndarray
+        the matching strings and their similarity
+    """
+    right_matrix = right_matrix.transpose().tocsr()
+    size = chunk_size or max(left_matrix.shape[0], 1)
+
+    found = [(np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0))]
+    for start in range(0, left_matrix.shape[0], size):
+        matches = _fast_cossim_top(
+            left_matrix[start : start + size],
+            right_matrix,
+            ntop=max_candidates,
+            lower_bound=lower_bound,
+            workers=workers,
+        )
+        rows, cols, similarity = _nonzero_matches(matches)
+        found.append((start + rows, cols, similarity))
+
+    return tuple(map(np.concatenate, zip(*found)))
+
+
+def _fuzzy_candidates(
+    left_unique, right_unique, score_cutoff, max_candidates, scorer, workers
+):
+    """
+    Find the best fuzzy matches of each left string among the right strings.
+
+    Returns
+    -------
+    left_codes, right_codes, scores : numpy.ndarray
+        the matching strings and their score, from 0 to 1
+    """
+    matches = _fuzzy_matches(
+        pd.Series(left_unique, dtype=object),
+        pd.DataFrame({"value": pd.Series(right_unique, dtype=object)}),
+        "value",
+        workers=workers,
+        score_cutoff=score_cutoff,
+        scorer=scorer,
+        max_matches=max_candidates,
+    )
+    return (
+        matches["left_pos"].values,
+        matches["right_pos"].values,
+        matches["match_probability"].values,
+    )
+
+
+def _tf_idf_similarity(left_matrix, right_matrix, left_codes, right_codes):
+    """
+    Calculate the cosine similarity of each input pair of strings.
+    """
+    return np.asarray(
+        left_matrix[left_codes].multiply(right_matrix[right_codes]).sum(axis=1)
+    ).ravel()
+
+
+def _fuzzy_similarity(left_unique, right_unique, left_codes, right_codes, scorer):
+    """
+    Calculate the fuzzy score, from 0 to 1, of each input pair of strings,
+    scoring each distinct pair once.
+    """
+    pair_codes, pairs = pd.factorize(left_codes * len(right_unique) + right_codes)
+    scores = np.array(
+        [
+            scorer(
+                utils.full_process(left_unique[pair // len(right_unique)]),
+                utils.full_process(right_unique[pair % len(right_unique)]),
+            )
+            for pair in pairs
+        ],
+        dtype=float,
+    )
+    return scores[pair_codes] / 100.0
+
+
+def _multi_matches(
+    left,
+    right,
+    left_on,
+    right_on,
+    method,
+    weights=None,
+    score_cutoff=90,
+    max_matches=1,
+    max_candidates=10,
+    scorer=fuzz.ratio,
+    chunk_size=None,
+    workers=1,
+    profiler=None,
+):
+    """
+    Internal function to match the left and right rows on several string
+    columns, where the match probability is the weighted mean of the
+    similarity of each column.
+
+    The candidate matches are the pairs of rows whose strings in the column
+    with the most distinct right strings are among the `max_candidates` most
+    similar. Only candidates that could score above the cutoff are kept,
+    assuming the other columns match perfectly, and the other columns are
+    only compared for the candidates. Missing strings have a similarity of
+    zero, and rows missing the candidate column are not matched.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if profiler is None:
+        profiler = _Profile()
+    if isinstance(left_on, str):
+        left_on = [left_on]
+    if isinstance(right_on, str):
+        right_on = [right_on]
+
+    # Check the inputs
+    if len(left_on) != len(right_on) or not len(left_on):
+        raise ValueError("`left_on` and `right_on` should have the same length")
+    if not all(col in left.columns for col in left_on):
+        raise ValueError("Some of the `on` columns are not present in `left`")
+    if not all(col in right.columns for col in right_on):
+        raise ValueError("Some of the `on` columns are not present in `right`")
+    if weights is None:
+        weights = np.ones(len(left_on))
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (len(left_on),) or not (weights > 0).all():
+        raise ValueError("`weights` should have a positive weight per `on` column")
+    weights = weights / weights.sum()
+
+    # the distinct strings of each column, and the string codes of each row
+    columns = []
+    left_strings = np.full((len(left_on), len(left)), -1, dtype=np.int64)
+    right_strings = np.full((len(right_on), len(right)), -1, dtype=np.int64)
+    for i, (left_col, right_col) in enumerate(zip(left_on, right_on)):
+        positions, codes, left_unique = _factorize_strings(left[left_col])
+        left_strings[i, positions] = codes
+        positions, codes, right_unique = _factorize_strings(right[right_col])
+        right_strings[i, positions] = codes
+        columns.append((left_unique, right_unique))
+
+    # the distinct records of the rows with a string in the candidate column
+    c = int(np.argmax([len(right_unique) for _, right_unique in columns]))
+    left_pos = np.flatnonzero(left_strings[c] >= 0)
+    left_codes, left_records = _record_codes(left_strings[:, left_pos])
+    right_pos = np.flatnonzero(right_strings[c] >= 0)
+    right_codes, right_records = _record_codes(right_strings[:, right_pos])
+    profiler.lap("factorize")
+
+    if method == "tf_idf":
+        vectors = [
+            _tf_idf_vectors(
+                left_unique, right_unique, left_strings[i], right_strings[i]
+            )
+            for i, (left_unique, right_unique) in enumerate(columns)
+        ]
+        profiler.lap("vectorize")
+
+    # the candidate strings, which could score above the cutoff even if the
+    # other columns match perfectly
+    lower_bound = max((score_cutoff / 100 - (1 - weights[c])) / weights[c], 0)
+    if method == "tf_idf":
+        found = _tf_idf_candidates(
+            *vectors[c], lower_bound, max_candidates, chunk_size, workers
+        )
+    else:
+        found = _fuzzy_candidates(
+            *columns[c],
+            int(np.floor(lower_bound * 100)),
+            max_candidates,
+            scorer,
+            workers,
+        )
+
+    # expand to all pairs of records with the candidate strings
+    left_groups = _group_positions(
+        left_records[c], len(columns[c][0]), np.arange(left_records.shape[1])
+    )
+    right_groups = _group_positions(
+        right_records[c], len(columns[c][1]), np.arange(right_records.shape[1])
+    )
+    left_found, right_found, scores = _broadcast(
+        left_groups, right_groups, found, right_records.shape[1]
+    )
+    profiler.lap("candidates")
+
+    # add the weighted similarity of the other columns
+    probability = weights[c] * scores
+    for i, (left_unique, right_unique) in enumerate(columns):
+        if i == c:
+            continue
+        left_col, right_col = left_records[i, left_found], right_records[i, right_found]
+        present = (left_col >= 0) & (right_col >= 0)
+        if method == "tf_idf":
+            similarity = _tf_idf_similarity(
+                *vectors[i], left_col[present], right_col[present]
+            )
+        else:
+            similarity = _fuzzy_similarity(
+                left_unique,
+                right_unique,
+                left_col[present],
+                right_col[present],
+                scorer,
+            )
+        probability[present] += weights[i] * similarity
+    profiler.lap("similarity")
+
+    # broadcast the matches above the cutoff back to the left and right rows
+    keep = probability >= score_cutoff / 100
+    left_pos, right_pos, probability = _broadcast(
+        _group_positions(left_codes, left_records.shape[1], left_pos),
+        _group_positions(right_codes, right_records.shape[1], right_pos),
+        (left_found[keep], right_found[keep], probability[keep]),
+        max_matches,
+    )
+    profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left),
+        left_records=left_records.shape[1],
+        right_rows=len(right),
+        right_records=right_records.shape[1],
+        candidates=len(scores),
+        matches=len(left_pos),
+    )
+    return pd.DataFrame(
+        {"left_pos": left_pos, "right_pos": right_pos, "match_probability": probability}
+    )
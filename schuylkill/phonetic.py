@@ -0,0 +1,442 @@
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+from .exact import _HashIndex, _broadcast_matches
+from .fuzzy import WorkerPool, _merge_matches
+from .index import MatchIndex, _unpack_index
+from .minhash import _rescore_candidates
+from .tf_idf import _words
+from .utils import _Profile, _factorize_sides, pipeable
+
+__all__ = ["phonetic_merge"]
+
+# the Soundex digit of each consonant; vowels separate repeated digits,
+# while H and W don't
+_SOUNDEX = str.maketrans("BFPVCGJKQSXZDTLMNRAEIOUY", "111122222222334556000000")
+
+_VOWELS = set("AEIOU")
+
+
+def _soundex(word):
+    """
+    The American Soundex code of the input upper-cased word.
+    """
+    digits = word.translate(_SOUNDEX)
+    code, last = word[0], digits[0]
+    for char, digit in zip(word[1:], digits[1:]):
+        if char in "HW":
+            continue
+        if digit != last and digit != "0":
+            code += digit
+        last = digit
+
+    return (code + "000")[:4]
+
+
+def _nysiis(word):
+    """
+    The NYSIIS code of the input upper-cased word.
+    """
+    # translate the first and last letters
+    for prefix, replacement in [
+        ("MAC", "MCC"),
+        ("KN", "NN"),
+        ("K", "C"),
+        ("PH", "FF"),
+        ("PF", "FF"),
+        ("SCH", "SSS"),
+    ]:
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix) :]
+            break
+    for suffix, replacement in [
+        ("EE", "Y"),
+        ("IE", "Y"),
+        ("DT", "D"),
+        ("RT", "D"),
+        ("RD", "D"),
+        ("NT", "D"),
+        ("ND", "D"),
+    ]:
+        if word.endswith(suffix):
+            word = word[: -len(suffix)] + replacement
+            break
+
+    # translate the remaining letters, skipping repeated codes
+    code, i = word[0], 1
+    while i < len(word):
+        char, rest = word[i], word[i:]
+        if rest.startswith("EV"):
+            letters = "AF"
+        elif char in _VOWELS:
+            letters = "A"
+        elif char in "QZM":
+            letters = {"Q": "G", "Z": "S", "M": "N"}[char]
+        elif rest.startswith("KN"):
+            letters = "N"
+        elif char == "K":
+            letters = "C"
+        elif rest.startswith("SCH"):
+            letters = "SSS"
+        elif rest.startswith("PH"):
+            letters = "FF"
+        elif char == "H" and (
+            word[i - 1] not in _VOWELS
+            or (i + 1 < len(word) and word[i + 1] not in _VOWELS)
+        ):
+            letters = word[i - 1]
+        elif char == "W" and word[i - 1] in _VOWELS:
+            letters = word[i - 1]
+        else:
+            letters = char
+
+        # the translation replaces the letters, so they aren't translated again
+        word = word[:i] + letters + word[i + len(letters) :]
+        for letter in letters:
+            if letter != code[-1]:
+                code += letter
+        i += len(letters)
+
+    # drop a trailing S or A, and translate a trailing AY
+    if len(code) > 1 and code.endswith("S"):
+        code = code[:-1]
+    if code.endswith("AY"):
+        code = code[:-2] + "Y"
+    if len(code) > 1 and code.endswith("A"):
+        code = code[:-1]
+    return code
+
+
+def _metaphone(word):
+    """
+    The (original) Metaphone code of the input upper-cased word.
+    """
+    # silent or transformed first letters
+    if word[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        word = word[1:]
+    elif word[0] == "X":
+        word = "S" + word[1:]
+    elif word[:2] == "WH":
+        word = "W" + word[2:]
+
+    code = ""
+    for i, char in enumerate(word):
+        prev = word[i - 1] if i else ""
+        following = word[i + 1] if i + 1 < len(word) else ""
+        after = word[i + 2] if i + 2 < len(word) else ""
+
+        # skip repeated letters, except C
+        if char == prev and char != "C":
+            continue
+
+        if char in _VOWELS:
+            if i == 0:
+                code += char
+        elif char == "B":
+            if not (prev == "M" and i == len(word) - 1):
+                code += "B"
+        elif char == "C":
+            if following == "I" and after == "A":
+                code += "X"
+            elif following == "H":
+                code += "K" if prev == "S" else "X"
+            elif following in ("I", "E", "Y"):
+                if prev != "S":
+                    code += "S"
+            else:
+                code += "K"
+        elif char == "D":
+            code += "J" if following == "G" and after in ("E", "Y", "I") else "T"
+        elif char == "G":
+            if following == "H" and after and after not in _VOWELS:
+                continue
+            if following == "N" and word[i + 1 :] in ("N", "NED"):
+                continue
+            if prev == "D" and following in ("E", "Y", "I"):
+                continue
+            code += "J" if following in ("E", "Y", "I") and prev != "G" else "K"
+        elif char == "H":
+            if prev in ("C", "S", "P", "T", "G"):
+                continue
+            if prev in _VOWELS and following not in _VOWELS:
+                continue
+            code += "H"
+        elif char == "K":
+            if prev != "C":
+                code += "K"
+        elif char == "P":
+            code += "F" if following == "H" else "P"
+        elif char == "Q":
+            code += "K"
+        elif char == "S":
+            if following == "H" or (following == "I" and after in ("O", "A")):
+                code += "X"
+            else:
+                code += "S"
+        elif char == "T":
+            if following == "I" and after in ("O", "A"):
+                code += "X"
+            elif following == "H":
+                code += "0"
+            elif not (following == "C" and after == "H"):
+                code += "T"
+        elif char == "V":
+            code += "F"
+        elif char in ("W", "Y"):
+            if following in _VOWELS:
+                code += char
+        elif char == "X":
+            code += "KS"
+        elif char == "Z":
+            code += "S"
+        else:
+            code += char
+
+    return code
+
+
+# the function encoding a word for each phonetic encoding
+_ENCODINGS = {"soundex": _soundex, "nysiis": _nysiis, "metaphone": _metaphone}
+
+
+def _phonetic_keys(values, encoding="metaphone"):
+    """
+    Return the phonetic key of each of the input distinct strings, the codes
+    of its words joined by spaces, or None for strings without any words.
+
+    Each distinct word is only encoded once. Words that aren't purely
+    alphabetic, such as house numbers, are kept as they are.
+    """
+    encode = _ENCODINGS[encoding]
+    words = [_words(value) for value in values]
+
+    # encode the distinct words
+    codes, uniques = pd.factorize(np.array([w for ws in words for w in ws] or [""]))
+    encoded = np.array(
+        [
+            encode(word.upper()) if word.isascii() and word.isalpha() else word
+            for word in uniques
+        ],
+        dtype=object,
+    )
+
+    # join the codes of the words of each string
+    keys = np.empty(len(values), dtype=object)
+    start = 0
+    for i, ws in enumerate(words):
+        keys[i] = (
+            " ".join(filter(None, encoded[codes[start : start + len(ws)]])) or None
+        )
+        start += len(ws)
+    return keys
+
+
+def _phonetic_matches(
+    left_values,
+    right,
+    right_on,
+    index=None,
+    encoding="metaphone",
+    rescore=False,
+    workers=1,
+    score_cutoff=90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+    profiler=None,
+):
+    """
+    Internal function to match the input left strings to the right data.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability" if
+        the matches are rescored
+    """
+    if encoding not in _ENCODINGS:
+        raise ValueError(f"encoding should be one of: {', '.join(_ENCODINGS)}")
+
+    if profiler is None:
+        profiler = _Profile()
+
+    # the distinct left and right strings
+    left_side, right_side = _factorize_sides(left_values, right, right_on, index)
+    left_pos, left_codes, left_unique = left_side
+    right_pos, right_codes, right_unique = right_side
+    profiler.lap("factorize")
+
+    # the phonetic keys of the distinct strings
+    left_keys = _phonetic_keys(left_unique, encoding)
+    right_keys = _phonetic_keys(right_unique, encoding)
+    profiler.lap("encode")
+
+    if not rescore:
+        # join the rows on their keys
+        left_rows = pd.Series(np.full(len(left_values), None, dtype=object))
+        left_rows.iloc[left_pos] = left_keys[left_codes]
+        right_rows = pd.Series(np.full(len(right), None, dtype=object))
+        right_rows.iloc[right_pos] = right_keys[right_codes]
+        left_pos, right_pos = _HashIndex(right_rows).lookup(left_rows)
+        matches = pd.DataFrame({"left_pos": left_pos, "right_pos": right_pos})
+        profiler.lap("lookup")
+        candidates = len(matches)
+    else:
+        # join the distinct strings on their keys
+        candidate_left, candidate_right = _HashIndex(pd.Series(right_keys)).lookup(
+            pd.Series(left_keys)
+        )
+        candidates = len(candidate_left)
+        profiler.lap("lookup")
+
+        # score the candidates of each distinct left string
+        found = _rescore_candidates(
+            left_unique,
+            right_unique,
+            candidate_left,
+            candidate_right,
+            workers=workers,
+            score_cutoff=score_cutoff,
+            scorer=scorer,
+            max_matches=max_matches,
+        )
+        profiler.lap("score")
+
+        # broadcast the matches back to the left and right rows
+        matches = _broadcast_matches(
+            found, left_pos, left_codes, right_pos, right_codes, max_matches
+        )
+        profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left_values),
+        left_unique=len(left_unique),
+        right_rows=len(right),
+        right_unique=len(right_unique),
+        candidate_pairs=candidates,
+        matches=len(matches),
+    )
+    return matches
+
+
+@pipeable
+def phonetic_merge(
+    left: pd.DataFrame,
+    right: Union[pd.DataFrame, MatchIndex],
+    on: str = None,
+    left_on: str = None,
+    right_on: str = None,
+    encoding: str = "metaphone",
+    rescore: bool = False,
+    workers: Union[int, WorkerPool] = 1,
+    score_cutoff: int = 90,
+    scorer=fuzz.ratio,
+    max_matches=1,
+    suffixes=("_x", "_y"),
+    profile: bool = False,
+):
+    """
+    Merge two dataframes based on the phonetic codes of the words in two
+    string columns, so that strings that sound the same match, e.g.,
+    "Schuylkill" and "Skulkill".
+
+    Each word is replaced by its phonetic code, and the rows are joined on
+    the codes of their words, like :func:`exact_merge`. The phonetic code of
+    each distinct word is only calculated once.
+
+    Notes
+    -----
+    -   This performs a "left" merge — all rows in the left data frame will be
+        present in the returned data frame
+    -   Data in the left data frame can match multiple values in the right column.
+    -   Without rescoring, all of the right rows with the same phonetic codes
+        match, and the "match_probability" is missing.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+        the left data to merge
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    on : str, optional
+        the column to merge on
+    left_on : str, optional
+        the name of the string column in the left data frame to merge on
+    right_on : str, optional
+        the name of the string column in the right data frame to merge on
+    encoding : str, optional
+        the phonetic code of the words, one of 'metaphone', 'soundex', or
+        'nysiis'; words that aren't purely alphabetic, such as house
+        numbers, must match exactly
+    rescore : bool, optional
+        whether to score the right strings with the same phonetic codes as
+        each left string with `scorer`, keeping the best `max_matches` that
+        score above `score_cutoff`
+    workers : int or WorkerPool, optional
+        the number of processes to rescore with, or a pool of processes to
+        reuse
+    score_cutoff : int, optional
+        when rescoring, only match strings that score above this threshold
+    scorer : callable, optional
+        the fuzzywuzzy function to rescore the matches with
+    max_matches : int, optional
+        when rescoring, the maximum number of matches to identify per row
+    suffixes : tuple of (str, str), default ('_x', '_y')
+        Suffix to apply to overlapping column names in the left and right
+        side, respectively. To raise an exception on overlapping columns use
+        (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        the merged dataframe containg all rows in `left` and any matched data
+        from the `right` data frame
+    """
+    if on is not None:
+        left_on = right_on = on
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
+
+    # Verify input parameters
+    if left_on is None or right_on is None:
+        raise ValueError("Please specify `on` or `left_on/right_on`")
+    if left_on not in left.columns:
+        raise ValueError(f"'{left_on}' is not a column in `left`")
+    if right_on not in right.columns:
+        raise ValueError(f"'{right_on}' is not a column in `right`")
+
+    # Make sure no duplicates in left index
+    if left.index.duplicated().sum():
+        raise ValueError("`left` dataframe has duplicate indices")
+
+    # get the matches
+    profiler = _Profile()
+    matches = _phonetic_matches(
+        left[left_on],
+        right,
+        right_on,
+        index,
+        encoding=encoding,
+        rescore=rescore,
+        workers=workers,
+        score_cutoff=score_cutoff,
+        scorer=scorer,
+        max_matches=max_matches,
+        profiler=profiler,
+    )
+    if "match_probability" not in matches.columns:
+        matches["match_probability"] = np.nan
+    out = _merge_matches(left, right, matches, suffixes)
+    profiler.lap("merge")
+
+    if profile:
+        profiler.attach(out, "phonetic_merge")
+    return out
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+from .exact import _broadcast, _group_positions
+from .fuzzy import _find_matches
+from .tf_idf import _fast_cossim_top, _nonzero_matches
+from .utils import _factorize_strings
+
+
+def _structure(index, key, build):
+    """
+    Return a query structure of the index, building it if necessary.
+
+    The structures are kept with the lookup structures of the index, so
+    they are saved with it and dropped when its rows change.
+    """
+    if key not in index._structures:
+        index._structures[key] = build(index)
+    return index._structures[key]
+
+
+def _fuzzy_found(index, values, score_cutoff=90, scorer=fuzz.ratio, max_matches=1):
+    """
+    Find the fuzzy matches of the input distinct strings.
+    """
+    qgrams = None
+    if scorer is fuzz.ratio and score_cutoff > 0 and len(index.uniques):
+        qgrams = index.build("fuzzy")
+
+    right_data = pd.Series(index.uniques, dtype=object)
+    found = []
+    for left_code, x in enumerate(values):
+        matched, _ = _find_matches(
+            x, right_data, score_cutoff, scorer=scorer, limit=max_matches, qgrams=qgrams
+        )
+        found += [(left_code, right_code, score) for _, score, right_code in matched]
+
+    left_codes, right_codes, scores = np.array(found, dtype=float).reshape(-1, 3).T
+    return left_codes.astype(int), right_codes.astype(int), scores / 100.0
+
+
+def _tf_idf_found(index, values, score_cutoff=90, max_matches=1):
+    """
+    Find the TF-IDF matches of the input distinct strings.
+    """
+    tf_idf = index.build("tf_idf")
+    right_matrix = _structure(
+        index, "query_tf_idf", lambda index: tf_idf.matrix.transpose().tocsr()
+    )
+
+    matches = _fast_cossim_top(
+        tf_idf.transform(values),
+        right_matrix,
+        ntop=max_matches,
+        lower_bound=score_cutoff / 100,
+    )
+    return _nonzero_matches(matches)
+
+
+# the function finding the matches of distinct strings for each method
+_FINDERS = {"fuzzy": _fuzzy_found, "tf_idf": _tf_idf_found}
+
+
+def _query_matches(index, values, method, max_matches=1, **kwargs):
+    """
+    Match the input query strings to the indexed right data.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching queries and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if method in ("exact", "startswith", "contains"):
+        left_pos, right_pos = index.build(method).lookup(values)
+        return pd.DataFrame(
+            {"left_pos": left_pos, "right_pos": right_pos, "match_probability": np.nan}
+        )
+    if method not in _FINDERS:
+        raise ValueError(
+            "method should be one of: 'exact', 'startswith', 'contains', 'fuzzy', "
+            "or 'tf_idf'"
+        )
+
+    # match the distinct query strings
+    left_pos, left_codes, uniques = _factorize_strings(values)
+    found = _FINDERS[method](index, uniques, max_matches=max_matches, **kwargs)
+
+    # broadcast to the queries and the right rows holding the matched strings
+    right_groups = _structure(
+        index,
+        "query_rows",
+        lambda index: _group_positions(
+            index.codes, len(index.uniques), index.positions
+        ),
+    )
+    left_pos, right_pos, scores = _broadcast(
+        _group_positions(left_codes, len(uniques), left_pos),
+        right_groups,
+        found,
+        max_matches,
+    )
+    return pd.DataFrame(
+        {"left_pos": left_pos, "right_pos": right_pos, "match_probability": scores}
+    )
+
+
+def _right_data(index, right_pos):
+    """
+    Return the "right_index" and the right columns of the input right rows,
+    only copying the matched rows; rows with position -1 are missing.
+    """
+    matched = np.flatnonzero(right_pos >= 0)
+    right_rows = (
+        index.right.iloc[right_pos[matched]].rename_axis("right_index").reset_index()
+    )
+    if len(matched) == len(right_pos):
+        return right_rows
+    return right_rows.set_axis(matched).reindex(np.arange(len(right_pos)))
+
+
+def _match_many(index, values, method="exact", **kwargs):
+    """
+    Match the input query strings to the indexed right data, returning the
+    matched right rows of each query.
+
+    See :meth:`MatchIndex.match_many`.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    matches = _query_matches(index, values, method, **kwargs)
+
+    # add the unmatched queries, without a right position
+    unmatched = np.ones(len(values), dtype=bool)
+    unmatched[matches["left_pos"].values] = False
+    rows = pd.concat(
+        [
+            matches,
+            pd.DataFrame(
+                {
+                    "left_pos": np.flatnonzero(unmatched),
+                    "right_pos": -1,
+                    "match_probability": np.nan,
+                }
+            ),
+        ],
+        ignore_index=True,
+    ).sort_values("left_pos", kind="stable")
+
+    # the queries and their matched right rows
+    out = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "query": values.values[rows["left_pos"].values],
+                    "match_probability": rows["match_probability"].values,
+                }
+            ),
+            _right_data(index, rows["right_pos"].values),
+        ],
+        axis=1,
+    )
+    out.index = pd.Index(rows["left_pos"].values)
+    return out
+
+
+def _matched_rows(index, values, method="exact", **kwargs):
+    """
+    Match the input query strings to the indexed right data, returning only
+    the matched right rows, indexed by the position of their query.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    matches = _query_matches(index, values, method, **kwargs)
+
+    out = pd.concat(
+        [
+            matches[["match_probability"]].reset_index(drop=True),
+            _right_data(index, matches["right_pos"].values),
+        ],
+        axis=1,
+    )
+    out.index = pd.Index(matches["left_pos"].values)
+    return out
+
+
+def _match_one(index, value, method="exact", **kwargs):
+    """
+    Match the input query string to the indexed right data, returning its
+    matched right rows.
+
+    See :meth:`MatchIndex.match_one`.
+    """
+    return _matched_rows(index, [value], method, **kwargs).reset_index(drop=True)
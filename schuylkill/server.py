@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from functools import partial
+
+import numpy as np
+
+from .index import MatchIndex
+from .query import _matched_rows
+
+__all__ = ["MatchServer", "serve"]
+
+# the matching methods of MatchIndex.match_many
+_METHODS = ["exact", "startswith", "contains", "fuzzy", "tf_idf"]
+
+# the reason phrase of each response status
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class _HTTPError(Exception):
+    """
+    An error returned to the client with the input status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MatchServer:
+    """
+    A local HTTP/JSON server matching query strings against a
+    :class:`MatchIndex` held in memory.
+
+    Concurrent requests are collected into micro-batches, and each batch is
+    matched at once, as by :meth:`MatchIndex.match_many`.
+
+    The server handles two requests:
+
+    -   ``POST /match``, with a JSON body of ``{"query": "..."}`` or
+        ``{"queries": ["...", ...]}``, returns ``{"matches": [...]}`` with
+        the list of matched right rows of the query, or a list of such lists
+    -   ``GET /stats`` returns the number of requests and batches handled and
+        the p50 and p99 latency of the recent requests, in milliseconds
+
+    Parameters
+    ----------
+    index : MatchIndex
+        the index of the right data
+    method : str, optional
+        the matching method, one of 'exact', 'startswith', 'contains',
+        'fuzzy', or 'tf_idf'
+    max_batch : int, optional
+        the maximum number of queries in a batch
+    max_wait : float, optional
+        the maximum time, in seconds, to wait for more requests to add to a
+        batch
+    history : int, optional
+        the number of recent requests to calculate the latency over
+    **kwargs :
+        any additional keyword arguments for :meth:`MatchIndex.match_many`
+    """
+
+    def __init__(
+        self,
+        index,
+        method="exact",
+        max_batch=256,
+        max_wait=0.002,
+        history=10000,
+        **kwargs,
+    ):
+        if not isinstance(index, MatchIndex):
+            raise ValueError("`index` should be a MatchIndex")
+        if method not in _METHODS:
+            raise ValueError(f"method should be one of: {', '.join(_METHODS)}")
+
+        self.index = index
+        self.method = method
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.kwargs = kwargs
+
+        self.requests = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=history)
+
+        self._server = None
+        self._batcher = None
+        self._queue = None
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """
+        Start accepting connections; use port 0 to pick a free port.
+
+        Returns
+        -------
+        port : int
+            the port the server is listening on
+        """
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stop the server.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+
+    def stats(self):
+        """
+        The number of requests and batches handled, and the p50 and p99
+        latency (in milliseconds) of the recent requests.
+        """
+        p50, p99 = (
+            np.percentile(1000 * np.array(self.latencies), [50, 99])
+            if self.latencies
+            else (np.nan, np.nan)
+        )
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "p50_ms": None if np.isnan(p50) else round(float(p50), 3),
+            "p99_ms": None if np.isnan(p99) else round(float(p99), 3),
+        }
+
+    async def match(self, queries):
+        """
+        Match the input query strings, as part of the next batch.
+
+        Returns
+        -------
+        matches : list of list of dict
+            the matched right rows of each query
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((list(queries), future))
+        return await future
+
+    async def _batch(self):
+        """
+        Collect the queued requests into batches and match each batch.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            size = len(requests[0][0])
+
+            # wait briefly for more requests to fill the batch
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                requests.append(request)
+                size += len(request[0])
+
+            # match all the queries at once, off the event loop
+            queries = [query for batch, _ in requests for query in batch]
+            try:
+                records = await loop.run_in_executor(
+                    None,
+                    partial(_records, self.index, queries, self.method, **self.kwargs),
+                )
+            except Exception as e:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+
+            # split the matches back into the requests
+            start = 0
+            for batch, future in requests:
+                if not future.done():
+                    future.set_result(records[start : start + len(batch)])
+                start += len(batch)
+
+    async def _handle(self, reader, writer):
+        """
+        Handle the requests on a client connection.
+        """
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except _HTTPError as e:
+                    # the body can't be skipped, so close the connection
+                    _write_response(
+                        writer, e.status, {"error": str(e)}, keep_alive=False
+                    )
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                start = time.perf_counter()
+                method, path, headers, body = request
+
+                try:
+                    status, response = 200, await self._respond(method, path, body)
+                except _HTTPError as e:
+                    status, response = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, response = 500, {"error": str(e)}
+
+                if path == "/match" and status == 200:
+                    self.requests += 1
+                    self.latencies.append(time.perf_counter() - start)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path, body):
+        """
+        Return the JSON response to a request.
+        """
+        if path == "/stats":
+            if method != "GET":
+                raise _HTTPError(405, "use GET for /stats")
+            return self.stats()
+        if path != "/match":
+            raise _HTTPError(404, f"unknown path '{path}'")
+        if method != "POST":
+            raise _HTTPError(405, "use POST for /match")
+
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise _HTTPError(400, "the request body should be JSON")
+        if isinstance(payload, dict) and isinstance(payload.get("query"), str):
+            return {"matches": (await self.match([payload["query"]]))[0]}
+        if (
+            isinstance(payload, dict)
+            and isinstance(payload.get("queries"), list)
+            and all(isinstance(query, str) for query in payload["queries"])
+        ):
+            return {"matches": await self.match(payload["queries"])}
+        raise _HTTPError(400, "the body should have a 'query' or 'queries'")
+
+
+def _records(index, queries, method, **kwargs):
+    """
+    Return the list of matched right rows of each of the input queries.
+    """
+    records = [[] for _ in queries]
+    matched = _matched_rows(index, queries, method, **kwargs)
+    for position, record in zip(
+        matched.index, json.loads(matched.to_json(orient="records"))
+    ):
+        records[position].append(record)
+    return records
+
+
+async def _read_request(reader):
+    """
+    Read an HTTP request, returning its method, path, headers and body, or
+    None once the client closes the connection; raises an error with status
+    400 for an invalid Content-Length header.
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise ConnectionError("malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise _HTTPError(400, "the Content-Length header should be a number")
+
+    body = await reader.readexactly(length)
+    return method, path.split("?")[0], headers, body
+
+
+def _write_response(writer, status, response, keep_alive=True):
+    """
+    Write a JSON response.
+    """
+    body = json.dumps(response).encode()
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode()
+        + body
+    )
+
+
+def serve(index, method="exact", host="127.0.0.1", port=8000, **kwargs):
+    """
+    Run a :class:`MatchServer` for the input index until interrupted.
+
+    Parameters
+    ----------
+    index : MatchIndex
+        the index of the right data
+    method : str, optional
+        the matching method, one of 'exact', 'startswith', 'contains',
+        'fuzzy', or 'tf_idf'
+    host : str, optional
+        the address to listen on
+    port : int, optional
+        the port to listen on
+    **kwargs :
+        any additional keyword arguments for :class:`MatchServer`
+    """
+
+    async def run():
+        server = MatchServer(index, method, **kwargs)
+        await server.start(host, port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m schuylkill",
+        description="Serve matches against a MatchIndex saved to disk.",
+    )
+    parser.add_argument("path", help="the directory of the saved index")
+    parser.add_argument(
+        "--method",
+        default="exact",
+        choices=_METHODS,
+        help="the matching method",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="the port to listen on")
+    parser.add_argument("--score-cutoff", type=int, help="the minimum match score")
+    parser.add_argument("--max-matches", type=int, help="the matches per query")
+    parser.add_argument(
+        "--max-batch", type=int, default=256, help="the maximum queries per batch"
+    )
+    parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=0.002,
+        help="the maximum time to wait to fill a batch, in seconds",
+    )
+    args = parser.parse_args(argv)
+
+    kwargs = {
+        name: value
+        for name, value in [
+            ("score_cutoff", args.score_cutoff),
+            ("max_matches", args.max_matches),
+        ]
+        if value is not None
+    }
+    serve(
+        MatchIndex.load(args.path),
+        args.method,
+        args.host,
+        args.port,
+        max_batch=args.max_batch,
+        max_wait=args.max_wait,
+        **kwargs,
+    )
@@ -0,0 +1,82 @@
+from typing import Union
+
+import pandas as pd
+from .exact import exact_merge
+from .fuzzy import WorkerPool, fuzzy_merge
+from .index import MatchIndex
+
+__all__ = ["stream_merge"]
+
+
+def stream_merge(
+    chunks,
+    right: Union[pd.DataFrame, MatchIndex],
+    merge=exact_merge,
+    on: str = None,
+    left_on: str = None,
+    right_on: str = None,
+    **kwargs,
+):
+    """
+    Merge a stream of left data frame chunks with the right data, yielding
+    the merged chunks.
+
+    The right data is indexed once, and the lookup structures are reused
+    for every chunk, so the memory used does not grow with the size of the
+    left data.
+
+    Notes
+    -----
+    -   Each chunk is merged independently, so for 'tf_idf' matching, the
+        TF-IDF vocabulary is fit to the right strings only.
+    -   For :func:`fuzzy_merge`, a single :class:`WorkerPool` is used for all
+        of the chunks, unless one is passed in as `workers`.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        the chunks of left data to merge, e.g., from
+        ``pd.read_csv(..., chunksize=100000)``
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    merge : callable, optional
+        the merge function: :func:`exact_merge`, :func:`fuzzy_merge`,
+        :func:`tf_idf_merge`, or :func:`cascade`
+    on : str, optional
+        the column to merge on
+    left_on : str, optional
+        the name of the string column in the left data frames to merge on
+    right_on : str, optional
+        the name of the string column in the right data frame to merge on
+    **kwargs :
+        any additional keyword arguments for `merge`
+
+    Yields
+    ------
+    merged : pandas.DataFrame
+        the merged data for each chunk
+    """
+    if on is not None:
+        left_on = right_on = on
+    if left_on is None:
+        raise ValueError("Please specify `on` or `left_on/right_on`")
+
+    # Index the right data once
+    if not isinstance(right, MatchIndex):
+        if right_on is None:
+            raise ValueError("Please specify `on` or `left_on/right_on`")
+        right = MatchIndex(right, right_on)
+    elif right_on is None:
+        right_on = right.on
+    kwargs.update(left_on=left_on, right_on=right_on)
+
+    # Reuse the same worker processes for all chunks
+    workers = kwargs.get("workers", 4)
+    if merge is fuzzy_merge and not isinstance(workers, WorkerPool) and workers > 1:
+        with WorkerPool(workers) as pool:
+            kwargs["workers"] = pool
+            for chunk in chunks:
+                yield merge(chunk, right, **kwargs)
+    else:
+        for chunk in chunks:
+            yield merge(chunk, right, **kwargs)
@@ -0,0 +1,107 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def data():
+
+    left = pd.DataFrame(
+        {"street": ["Washington", "Market St", "Broad", "Market St"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Washington", "Market Street", "Spruce"], "y": [4, 5, 6]}
+    )
+    return left, right
+
+
+def test_cache_fuzzy(data, tmp_path):
+
+    left, right = data
+    expected = skool.fuzzy_merge(left, right, on="street", score_cutoff=80)
+
+    with skool.MatchCache(tmp_path / "cache.db") as cache:
+
+        # the first merge fills the cache
+        merged = skool.fuzzy_merge(
+            left, right, on="street", score_cutoff=80, cache=cache, profile=True
+        )
+        pd.testing.assert_frame_equal(merged, expected)
+        assert merged.attrs["profile"]["counts"]["cache_hits"] == 0
+        assert len(cache) == 3
+
+        # the second only matches the new strings
+        left.loc[4] = ["Sprce", 5]
+        merged = skool.fuzzy_merge(
+            left, right, on="street", score_cutoff=80, cache=cache, profile=True
+        )
+        assert merged.attrs["profile"]["counts"]["cache_hits"] == 3
+        assert merged["right_index"].fillna(-1).tolist() == [0, 1, -1, 1, 2]
+
+    # the cache persists, but isn't used for changed parameters or right data
+    with skool.MatchCache(tmp_path / "cache.db") as cache:
+        merged = skool.fuzzy_merge(
+            left, right, on="street", score_cutoff=90, cache=cache, profile=True
+        )
+        assert merged.attrs["profile"]["counts"]["cache_hits"] == 0
+
+        right.loc[1, "street"] = "Market"
+        merged = skool.fuzzy_merge(
+            left, right, on="street", score_cutoff=80, cache=cache, profile=True
+        )
+        assert merged.attrs["profile"]["counts"]["cache_hits"] == 0
+
+        # custom scorers must be identifiable
+        with pytest.raises(ValueError):
+            skool.fuzzy_merge(
+                left, right, on="street", scorer=lambda a, b: 0, cache=cache
+            )
+
+
+def test_cache_full_hit(data, tmp_path, monkeypatch):
+
+    left, right = data
+
+    with skool.MatchCache(tmp_path / "cache.db") as cache:
+        expected = skool.fuzzy_merge(left, right, on="street", cache=cache)
+
+        # a rerun on cached strings builds no q-gram index or worker pool
+        def fail(*args, **kwargs):
+            raise AssertionError("the strings should all be cached")
+
+        monkeypatch.setattr(skool.fuzzy, "_QgramIndex", fail)
+        monkeypatch.setattr(skool.fuzzy, "WorkerPool", fail)
+        merged = skool.fuzzy_merge(left, right, on="street", cache=cache, profile=True)
+        assert merged.attrs["profile"]["counts"]["cache_hits"] == 3
+        pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_cache_tf_idf(data, tmp_path):
+
+    left, right = data
+    index = skool.MatchIndex(right, "street")
+    expected = skool.tf_idf_merge(left, index, on="street", score_cutoff=50)
+
+    with skool.MatchCache(tmp_path / "cache.db") as cache:
+        for hits in [0, 3]:
+            merged = skool.tf_idf_merge(
+                left, index, on="street", score_cutoff=50, cache=cache, profile=True
+            )
+            pd.testing.assert_frame_equal(merged, expected)
+            assert merged.attrs["profile"]["counts"]["cache_hits"] == hits
+
+        # the TF-IDF weights depend on the left data without an index
+        with pytest.raises(ValueError):
+            skool.tf_idf_merge(left, right, on="street", cache=cache)
+
+
+def test_cache_eviction(data, tmp_path):
+
+    left, right = data
+
+    with skool.MatchCache(tmp_path / "cache.db", max_size=30) as cache:
+        skool.fuzzy_merge(left, right, on="street", score_cutoff=80, cache=cache)
+        assert 0 < len(cache) < 3
+
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,96 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+def test_cascade():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Mark", "road", "Brod"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "y": [4, 5, 6]})
+
+    # merge
+    merged = skool.cascade(
+        left,
+        right,
+        [
+            "exact",
+            "startswith",
+            "contains",
+            ("fuzzy", {"score_cutoff": 80, "workers": 1}),
+        ],
+        on="street",
+    )
+
+    # all should have matches
+    assert len(merged.dropna(subset=["right_index"])) == 4
+    assert merged["right_index"].tolist() == [0, 1, 2, 2]
+    assert merged["match_probability"].isnull().tolist() == [True, True, True, False]
+    assert list(merged.columns) == [
+        "street_x",
+        "x",
+        "match_probability",
+        "right_index",
+        "street_y",
+        "y",
+    ]
+
+
+def test_cascade_pipe():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Mark", "road", None, "Spruce"], "x": range(5)}
+    )
+    right = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "y": [4, 5, 6]})
+
+    # merge with a cascade and with pipe
+    merged = skool.cascade(
+        left, right, ["exact", ("tf_idf", {"score_cutoff": 20})], on="street"
+    )
+    piped = skool.exact_merge(left, right, on="street").pipe(
+        skool.tf_idf_merge, left, right, on="street", score_cutoff=20
+    )
+
+    # test
+    pd.testing.assert_frame_equal(merged, piped[merged.columns], check_dtype=False)
+
+
+def test_cascade_bad_stage():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Washington", "Mark", "road"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "y": [4, 5, 6]})
+
+    with pytest.raises(ValueError):
+        skool.cascade(left, right, ["exact", "soundex"], on="street")
+
+    # arguments the stages don't accept
+    for stage in [("fuzzy", {"by": "street"}), ("exact", {"score_cutoff": 90})]:
+        with pytest.raises(ValueError, match="doesn't accept"):
+            skool.cascade(left, right, [stage], on="street")
+
+
+def test_cascade_profile():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Washington", "Mark", "Brod"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "y": [4, 5, 6]})
+
+    # merge
+    merged = skool.cascade(
+        left,
+        right,
+        ["exact", ("fuzzy", {"score_cutoff": 85, "workers": 1})],
+        on="street",
+        profile=True,
+    )
+
+    # test
+    profile = merged.attrs["profile"]
+    assert profile["counts"] == {"left_rows": 3, "matched_rows": 2}
+    assert [stage["method"] for stage in profile["stages"]] == ["exact", "fuzzy"]
+    assert profile["stages"][1]["counts"]["left_rows"] == 2
+    assert profile["stages"][1]["counts"]["matched_pairs"] == 1
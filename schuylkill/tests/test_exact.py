@@ -101,3 +101,98 @@ def test_bad_ons():
     # bad on
     with pytest.raises(ValueError):
         merged = skool.exact_merge(left, right, right_on="street")
+
+
+def test_exact_multiple_matches():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Market", "Broad", None], "x": [1, 2, 3]})
+    right = pd.DataFrame(
+        {"street": ["Market", "Broad", "Market", None], "y": [1, 2, 3, 4]},
+        index=[10, 20, 30, 40],
+    )
+
+    # merge
+    merged = skool.exact_merge(left, right, on="street")
+
+    # test
+    assert len(merged) == 4
+    assert merged["right_index"].tolist()[:3] == [10, 30, 20]
+    assert merged["right_index"].isnull().sum() == 1
+
+
+def test_startswith_multiple_matches():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Ma", "Market St", "", 1], "x": [1, 2, 3, 4]})
+    right = pd.DataFrame({"street": ["Market St", "Broad", "Main St"], "y": [1, 2, 3]})
+
+    # merge
+    merged = skool.exact_merge(left, right, on="street", how="startswith")
+
+    # test
+    assert merged.loc[0, "right_index"].tolist() == [0, 2]
+    assert merged.loc[1, "right_index"] == 0
+    assert merged.loc[2, "right_index"].tolist() == [0, 1, 2]
+    assert pd.isnull(merged.loc[3, "right_index"])
+
+
+def test_contains_multiple_matches():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["ar", "St", "Market St", "Walnut"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Market St", "Broad St", "Market St", "Spruce"], "y": [1, 2, 3, 4]}
+    )
+
+    # merge
+    merged = skool.exact_merge(left, right, on="street", how="contains")
+
+    # test
+    assert merged.loc[0, "right_index"].tolist() == [0, 2]
+    assert merged.loc[1, "right_index"].tolist() == [0, 1, 2]
+    assert merged.loc[2, "right_index"].tolist() == [0, 2]
+    assert pd.isnull(merged.loc[3, "right_index"])
+
+
+def test_profile():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street": ["Washington", "Mrkt", "Brd"], "y": [4, 5, 6]})
+
+    # merge
+    merged = skool.exact_merge(left, right, on="street", profile=True)
+
+    # test
+    profile = merged.attrs["profile"]
+    assert set(profile["times"]) == {"index", "lookup", "merge"}
+    assert profile["counts"] == {"left_rows": 3, "right_rows": 3, "matches": 1}
+    assert "profile" not in skool.exact_merge(left, right, on="street").attrs
+
+
+@pytest.mark.parametrize("dtype", ["category", "string"])
+def test_key_dtypes(dtype):
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["ar", "St", None, "Market St", "Walnut"], "x": [1, 2, 3, 4, 5]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Market St", None, "Broad St", "Market St"], "y": [1, 2, 3, 4]}
+    )
+
+    # categorical and string keys match the same rows as object keys
+    for how in ["exact", "startswith", "contains"]:
+        expected = skool.exact_merge(left, right, on="street", how=how)
+        merged = skool.exact_merge(
+            left.astype({"street": dtype}),
+            right.astype({"street": dtype}),
+            on="street",
+            how=how,
+        )
+        pd.testing.assert_frame_equal(
+            merged[["x", "right_index", "y"]], expected[["x", "right_index", "y"]]
+        )
@@ -1,6 +1,7 @@
 import schuylkill as skool
 import pytest
 import pandas as pd
+from fuzzywuzzy import fuzz
 
 
 def test_fuzzy():
@@ -47,6 +48,20 @@ def test_threshold():
     assert len(merged.dropna()) == 1
 
 
+def test_no_matches():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Spruce", "Walnut"], "x": [1, 2]})
+    right = pd.DataFrame({"street": ["Washington", "Market"], "y": [4, 5]})
+
+    # merge
+    merged = skool.fuzzy_merge(left, right, on="street", score_cutoff=90, workers=1)
+
+    # test
+    assert len(merged) == len(left)
+    assert merged["right_index"].isnull().all()
+
+
 def test_missing_on():
 
     # Create the data
@@ -71,3 +86,179 @@ def test_bad_ons():
     # bad on
     with pytest.raises(ValueError):
         merged = skool.fuzzy_merge(left, right, right_on="street")
+
+
+def test_qgram_candidates():
+
+    from schuylkill.fuzzy import _QgramIndex, _find_matches
+
+    # Create the data
+    right = pd.Series(
+        [
+            "1500 Market St",
+            "1500 Market Street",
+            "15 Market St",
+            "Broad St",
+            "",
+            "!",
+            "1500 MARKET ST",
+        ]
+    ).rename_axis("right_index")
+    index = _QgramIndex(right)
+
+    # the candidates never drop a match, and ties are ordered the same
+    for x in ["1500 Market St", "1500 Mrkt St", "Brd St", "Market", "", "?"]:
+        for cutoff in [1, 50, 70, 90, 100]:
+            for limit in [1, 2, 10]:
+                expected, _ = _find_matches(x, right, cutoff, limit=limit)
+                found, _ = _find_matches(x, right, cutoff, limit=limit, qgrams=index)
+                assert found == expected
+
+    # dissimilar strings are filtered out
+    assert index.candidates("1500 Market St", 90).tolist() == [0, 2, 6]
+
+
+def test_duplicates():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Market", "Broad", "Market", "Market"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Mrkt", "Brd", "Market", "Market"], "y": [4, 5, 6, 7]}
+    )
+
+    # merge
+    merged = skool.fuzzy_merge(left, right, on="street", score_cutoff=70)
+
+    # test
+    assert len(merged) == len(left)
+    assert merged["right_index"].tolist() == [2, 1, 2, 2]
+    assert merged["match_probability"].tolist() == [1.0, 0.75, 1.0, 1.0]
+
+    # merge, with multiple matches
+    merged = skool.fuzzy_merge(left, right, on="street", score_cutoff=70, max_matches=3)
+    assert sorted(merged.loc[0, "right_index"]) == [0, 2, 3]
+
+
+def test_worker_pool():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "x": [1, 2, 3]})
+    right_1 = pd.DataFrame({"street": ["Washington", "Mrkt", "Brd"], "y": [4, 5, 6]})
+    right_2 = pd.DataFrame({"street": ["Brd", "Washingtn"], "y": [7, 8]})
+
+    # merge, reusing the same processes
+    with skool.WorkerPool(workers=2) as pool:
+        merged_1 = skool.fuzzy_merge(
+            left, right_1, on="street", score_cutoff=70, workers=pool
+        )
+        merged_2 = skool.fuzzy_merge(
+            left, right_2, on="street", score_cutoff=70, workers=pool
+        )
+
+    # test
+    expected = skool.fuzzy_merge(left, right_1, on="street", score_cutoff=70, workers=1)
+    pd.testing.assert_frame_equal(merged_1, expected)
+    assert merged_2["y"].tolist()[::2] == [8, 7]
+
+
+@pytest.mark.parametrize("dtype", ["category", "string"])
+def test_key_dtypes(dtype):
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Market", "Broad", None, "Market"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame({"street": ["Mrkt", "Brd", None], "y": [4, 5, 6]})
+
+    # merge
+    expected = skool.fuzzy_merge(left, right, on="street", score_cutoff=70)
+    merged = skool.fuzzy_merge(
+        left.astype({"street": dtype}),
+        right.astype({"street": dtype}),
+        on="street",
+        score_cutoff=70,
+    )
+
+    # test
+    columns = ["x", "match_probability", "right_index", "y"]
+    pd.testing.assert_frame_equal(merged[columns], expected[columns])
+    assert merged["right_index"].tolist()[:2] == [0, 1]
+
+
+def test_by():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Market", "Market", "Broad"], "zip": [19103, 19104, None]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Market", "Mrkt", "Broad"], "zip_code": [19104, 19103, 19103]}
+    )
+
+    # only rows in the same block match, and rows without a block don't match
+    merged = skool.fuzzy_merge(
+        left, right, on="street", left_by="zip", right_by="zip_code", score_cutoff=0
+    )
+    assert merged["right_index"].tolist()[:2] == [1, 0]
+    assert merged["right_index"].isna().tolist() == [False, False, True]
+
+    # each block is matched separately by the workers
+    with skool.WorkerPool(workers=2) as pool:
+        pooled = skool.fuzzy_merge(
+            left.rename(columns={"zip": "zip_code"}),
+            right,
+            on="street",
+            by="zip_code",
+            score_cutoff=0,
+            workers=pool,
+        )
+    assert pooled["right_index"].equals(merged["right_index"])
+
+    # the blocking columns should exist
+    with pytest.raises(ValueError):
+        skool.fuzzy_merge(left, right, on="street", by="zip")
+
+
+def test_several_ons():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"owner": ["Jon Smith", "Jane Doe"], "street": ["Market St", "Market St"]}
+    )
+    right = pd.DataFrame(
+        {
+            "name": ["Jane Doe", "John Smith", "Jane Dole"],
+            "address": ["Market Street", "Market Street", "Broad Street"],
+        }
+    )
+
+    # the match probability is the weighted mean of the column scores
+    merged = skool.fuzzy_merge(
+        left,
+        right,
+        left_on=["street", "owner"],
+        right_on=["address", "name"],
+        weights=[1, 3],
+        score_cutoff=80,
+        workers=1,
+    )
+    assert merged["right_index"].tolist() == [1, 0]
+    assert merged.loc[0, "match_probability"] == pytest.approx(
+        (
+            fuzz.ratio("market st", "market street")
+            + 3 * fuzz.ratio("jon smith", "john smith")
+        )
+        / 400
+    )
+
+    # the weights should match the columns
+    with pytest.raises(ValueError):
+        skool.fuzzy_merge(
+            left,
+            right,
+            left_on=["street", "owner"],
+            right_on=["address", "name"],
+            weights=[1],
+        )
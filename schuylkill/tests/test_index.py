@@ -0,0 +1,166 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+def test_index_exact():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Wash", "road", "Market"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "y": [1, 2, 3]})
+    index = skool.MatchIndex(right, "street")
+
+    # merge
+    for how in ["exact", "startswith", "contains"]:
+        expected = skool.exact_merge(left, right, on="street", how=how)
+        merged = skool.exact_merge(left, index, on="street", how=how)
+        pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_index_fuzzy():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Washington", "Market", "Broad"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street": ["Washington", "Mrkt", "Brd"], "y": [4, 5, 6]})
+    index = skool.MatchIndex(right, "street")
+
+    # merge
+    expected = skool.fuzzy_merge(left, right, on="street", score_cutoff=0)
+    merged = skool.fuzzy_merge(left, index, left_on="street", score_cutoff=0)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_index_save_load(tmp_path):
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Market St", "Broad"], "x": [1, 2, 3]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Washington", "Market Street", "Spruce"], "y": [4, 5, 6]}
+    )
+    index = skool.MatchIndex(right, "street", methods=["exact", "tf_idf"])
+    expected = skool.tf_idf_merge(left, index, on="street", score_cutoff=50)
+
+    # save and load
+    index.save(tmp_path)
+    loaded = skool.MatchIndex.load(tmp_path)
+
+    # test
+    merged = skool.tf_idf_merge(left, loaded, on="street", score_cutoff=50)
+    pd.testing.assert_frame_equal(merged, expected)
+    assert merged.loc[1, "right_index"] == 1
+    assert merged.loc[2, "right_index"] != merged.loc[2, "right_index"]
+    pd.testing.assert_frame_equal(
+        skool.exact_merge(left, loaded, on="street"),
+        skool.exact_merge(left, right, on="street"),
+    )
+
+
+def test_index_bad_ons():
+
+    # Create the data
+    right = pd.DataFrame({"street": ["Washington"], "y": [1]})
+    left = pd.DataFrame({"street_1": ["Washington"], "x": [1]})
+
+    # bad on
+    with pytest.raises(ValueError):
+        skool.MatchIndex(right, "street_2")
+
+    # mismatched right on
+    index = skool.MatchIndex(right, "street")
+    with pytest.raises(ValueError):
+        skool.exact_merge(left, index, left_on="street_1", right_on="y")
+
+    # bad method
+    with pytest.raises(ValueError):
+        index.build("phonetic")
+
+
+def test_index_append_drop():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Market St", "Broad St", "Spruce"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame(
+        {
+            "street": ["Washington", "Market Street", "Broad Street", "Market Street"],
+            "y": [4, 5, 6, 7],
+        }
+    )
+    index = skool.MatchIndex(right.iloc[:2], "street", methods=["exact", "tf_idf"])
+
+    # add rows, recalculating the IDF weights
+    index.append(right.iloc[2:], idf_tolerance=0)
+    merged = skool.tf_idf_merge(left, index, on="street", score_cutoff=50)
+    expected = skool.tf_idf_merge(
+        left, skool.MatchIndex(right, "street"), on="street", score_cutoff=50
+    )
+    pd.testing.assert_frame_equal(merged, expected)
+    assert merged["right_index"].tolist()[:3] == [0, 1, 2]
+
+    # remove rows
+    index.drop([0, 1], idf_tolerance=0)
+    remaining = right.drop([0, 1])
+    pd.testing.assert_frame_equal(
+        skool.tf_idf_merge(left, index, on="street", score_cutoff=50),
+        skool.tf_idf_merge(
+            left, skool.MatchIndex(remaining, "street"), on="street", score_cutoff=50
+        ),
+    )
+    pd.testing.assert_frame_equal(
+        skool.exact_merge(left, index, on="street"),
+        skool.exact_merge(left, remaining, on="street"),
+    )
+
+    # bad updates
+    with pytest.raises(ValueError):
+        index.append(right.iloc[2:])
+    with pytest.raises(ValueError):
+        index.drop([0])
+
+
+def test_index_append_duplicates():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Market St", "Broad St"], "x": [1, 2, 3]}
+    )
+    right = pd.DataFrame(
+        {
+            "street": ["Washington", "Market St", "Broad St", "Broad St", "Market St"],
+            "y": [4, 5, 6, 7, 8],
+        }
+    )
+    index = skool.MatchIndex(right.iloc[:2], "street", methods=["exact", "tf_idf"])
+
+    # add rows repeating a new string and an existing string
+    index.append(right.iloc[2:], idf_tolerance=0)
+    for merge in [skool.exact_merge, skool.tf_idf_merge]:
+        pd.testing.assert_frame_equal(
+            merge(left, index, on="street"),
+            merge(left, skool.MatchIndex(right, "street"), on="street"),
+        )
+    assert len(index.uniques) == 3
+
+
+def test_index_append_stale_idf():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Walnut St"], "x": [1]})
+    right = pd.DataFrame(
+        {"street": [f"{i} Market Street" for i in range(20)], "y": range(20)}
+    )
+    index = skool.MatchIndex(right, "street", methods=["tf_idf"])
+    idf = index.build("tf_idf").idf.copy()
+
+    # a small update keeps the existing IDF weights
+    index.append(pd.DataFrame({"street": ["Walnut Street"], "y": [20]}, index=[20]))
+    tf_idf = index.build("tf_idf")
+    assert (tf_idf.idf[: len(idf)] == idf).all()
+    assert len(tf_idf.idf) > len(idf)
+
+    # the new string is matched
+    merged = skool.tf_idf_merge(left, index, on="street", score_cutoff=50)
+    assert merged["right_index"].tolist() == [20]
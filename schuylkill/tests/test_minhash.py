@@ -0,0 +1,85 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def data():
+
+    left = pd.DataFrame(
+        {
+            "street": ["1234 Washington Avenue", "600 Market St", "100 Broad Street"],
+            "x": [1, 2, 3],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "street": [
+                "1234 Washington Ave",
+                "600 Market Street",
+                "2000 Spruce Street",
+            ],
+            "y": [4, 5, 6],
+        }
+    )
+    return left, right
+
+
+def test_minhash(data):
+
+    left, right = data
+
+    # merge
+    merged = skool.minhash_merge(left, right, on="street", score_cutoff=85, workers=1)
+    fuzzy = skool.fuzzy_merge(left, right, on="street", score_cutoff=85, workers=1)
+
+    # same matches as the exhaustive fuzzy merge
+    assert len(merged) == len(left)
+    assert merged["right_index"].tolist()[:2] == [0, 1]
+    assert merged["right_index"].isnull().tolist() == [False, False, True]
+    pd.testing.assert_frame_equal(merged, fuzzy)
+
+
+def test_no_rescore(data):
+
+    left, right = data
+
+    # merge on the estimated Jaccard similarity
+    merged = skool.minhash_merge(
+        left, right, on="street", score_cutoff=85, rescore=False, workers=1
+    )
+
+    # the exact matches are found, with probabilities from the similarity
+    assert merged["right_index"].isnull().tolist() == [False, False, True]
+    assert (merged["match_probability"].dropna() <= 1).all()
+
+
+def test_cascade_stage(data):
+
+    left, right = data
+    index = skool.MatchIndex(right, on="street", methods=["minhash"])
+
+    # merge
+    merged = skool.cascade(
+        left,
+        index,
+        ["exact", ("minhash", {"score_cutoff": 85, "workers": 1})],
+        on="street",
+    )
+
+    # test
+    assert merged["right_index"].tolist()[:2] == [0, 1]
+    assert merged["right_index"].isnull().tolist() == [False, False, True]
+
+
+def test_case_and_punctuation():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["1500 MARKET STREET"]})
+    right = pd.DataFrame({"street": ["1500 market street.", "1500 Walnut Street"]})
+
+    # the strings are shingled as the scorer processes them
+    merged = skool.minhash_merge(left, right, on="street", score_cutoff=90, workers=1)
+    expected = skool.fuzzy_merge(left, right, on="street", score_cutoff=90, workers=1)
+    pd.testing.assert_frame_equal(merged, expected)
+    assert merged["right_index"].tolist() == [0]
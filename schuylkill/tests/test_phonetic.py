@@ -0,0 +1,64 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+from schuylkill.phonetic import _metaphone, _nysiis, _soundex
+
+
+@pytest.mark.parametrize(
+    "word, code",
+    [("ROBERT", "R163"), ("RUPERT", "R163"), ("ASHCRAFT", "A261"), ("TYMCZAK", "T522")],
+)
+def test_soundex(word, code):
+    assert _soundex(word) == code
+
+
+def test_encodings():
+    assert _metaphone("KNIGHT") == "NT"
+    assert _metaphone("THOMPSON") == "0MPSN"
+    assert _nysiis("JOHNSON") == _nysiis("JONSON") == "JANSAN"
+    assert _nysiis("MACINTOSH") == "MCANT"
+
+
+def test_sounds_alike():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["1500 Schuylkill Ave", "Passyunk", "Broad"]})
+    right = pd.DataFrame(
+        {"street": ["1500 Skulkill Ave", "Pasyunk", "Pasyunk", "1600 Skulkill Ave"]}
+    )
+
+    # merge
+    merged = skool.phonetic_merge(left, right, on="street")
+
+    # all of the right rows with the same codes match, without a probability
+    assert merged["right_index"].tolist()[:3] == [0, 1, 2]
+    assert merged["match_probability"].isnull().all()
+    assert pd.isna(merged["right_index"].iloc[-1])
+
+
+def test_rescore():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Jonson St", "Smith St"]})
+    right = pd.DataFrame({"street": ["Johnson Street", "Johnson St", "Smyth St"]})
+
+    # merge
+    merged = skool.phonetic_merge(
+        left, right, on="street", rescore=True, score_cutoff=90
+    )
+
+    # only the best match above the cutoff is kept
+    assert merged["right_index"].tolist()[0] == 1
+    assert merged["match_probability"].iloc[0] == 0.95
+    assert pd.isna(merged["right_index"].iloc[1])
+
+
+def test_bad_encoding():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Market St"]})
+    right = pd.DataFrame({"street": ["Market St"]})
+
+    # test
+    with pytest.raises(ValueError):
+        skool.phonetic_merge(left, right, on="street", encoding="caverphone")
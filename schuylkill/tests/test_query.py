@@ -0,0 +1,90 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def data():
+
+    left = pd.DataFrame(
+        {
+            "street": ["Market St", "Washington Ave", None, "Brd St", "Market St"],
+            "x": [1, 2, 3, 4, 5],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "street": [
+                "Washington Avenue",
+                "Market Street",
+                None,
+                "Broad Street",
+                "Market Street",
+            ],
+            "y": [4, 5, 6, 7, 8],
+        },
+        index=list("abcde"),
+    )
+    return left, right
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        ("exact", {}),
+        ("startswith", {}),
+        ("fuzzy", {"score_cutoff": 60, "max_matches": 2}),
+        ("tf_idf", {"score_cutoff": 30, "max_matches": 2}),
+    ],
+)
+def test_match_many(data, method, kwargs):
+
+    left, right = data
+    index = skool.MatchIndex(right, "street")
+
+    # match
+    matches = index.match_many(left["street"], method, **kwargs)
+
+    # the same matches as the merge
+    if method == "fuzzy":
+        merged = skool.fuzzy_merge(left, index, on="street", workers=1, **kwargs)
+    elif method == "tf_idf":
+        merged = skool.tf_idf_merge(left, index, on="street", **kwargs)
+    else:
+        merged = skool.exact_merge(left, index, on="street", how=method)
+        merged["match_probability"] = float("nan")
+
+    # test
+    assert matches.index.tolist() == merged.index.tolist()
+    assert matches["query"].tolist()[:2] == merged["street_x"].tolist()[:2]
+    for col in ["match_probability", "right_index", "y"]:
+        pd.testing.assert_series_equal(matches[col], merged[col])
+
+
+def test_match_one(data):
+
+    left, right = data
+    index = skool.MatchIndex(right, "street")
+
+    # match
+    matches = index.match_one("Market Stret", "fuzzy", score_cutoff=80, max_matches=3)
+
+    # test
+    assert matches["right_index"].tolist() == ["b", "e"]
+    assert matches["y"].tolist() == [5, 8]
+    assert matches["match_probability"].tolist() == [0.96, 0.96]
+    assert list(matches.columns) == ["match_probability", "right_index", "street", "y"]
+    assert not len(index.match_one("Spruce St", "fuzzy"))
+
+    # the new rows are matched after an append
+    index.append(pd.DataFrame({"street": ["Spruce St"], "y": [9]}, index=["f"]))
+    assert index.match_one("Spruce St", "exact")["right_index"].tolist() == ["f"]
+
+
+def test_bad_method(data):
+
+    left, right = data
+    index = skool.MatchIndex(right, "street")
+
+    with pytest.raises(ValueError):
+        index.match_one("Market St", "minhash")
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+async def _request(port, method, path, payload=None):
+    """Send a request to the server, returning the status and JSON body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+@pytest.fixture
+def index():
+
+    right = pd.DataFrame(
+        {
+            "street": ["Washington Avenue", "Market Street", "Broad Street"],
+            "y": [4, 5, 6],
+        }
+    )
+    return skool.MatchIndex(right, "street")
+
+
+def test_server(index):
+    async def run():
+        server = skool.MatchServer(index, "tf_idf", score_cutoff=50, max_wait=0.05)
+        port = await server.start(port=0)
+        try:
+            # concurrent requests are batched together
+            queries = ["Market St", "Broad St", "Spruce St", "Washington Ave"]
+            responses = await asyncio.gather(
+                *[_request(port, "POST", "/match", {"query": q}) for q in queries]
+            )
+            batch = await _request(port, "POST", "/match", {"queries": queries})
+            stats = await _request(port, "GET", "/stats")
+            errors = [
+                await _request(port, "POST", "/match", {"street": "Market St"}),
+                await _request(port, "GET", "/match"),
+                await _request(port, "GET", "/missing"),
+            ]
+        finally:
+            await server.close()
+        return responses, batch, stats, errors
+
+    responses, batch, stats, errors = asyncio.run(run())
+
+    # the matches of each query
+    assert [status for status, _ in responses] == [200] * 4
+    matches = [response["matches"] for _, response in responses]
+    assert [[m["right_index"] for m in found] for found in matches] == [
+        [1],
+        [2],
+        [],
+        [0],
+    ]
+    assert matches[0][0]["street"] == "Market Street"
+    assert matches[0][0]["y"] == 5
+    assert batch == (200, {"matches": matches})
+
+    # the latency stats
+    status, stats = stats
+    assert status == 200
+    assert stats["requests"] == 5
+    assert stats["batches"] <= 3
+    assert 0 < stats["p50_ms"] <= stats["p99_ms"]
+
+    # bad requests
+    assert [status for status, _ in errors] == [400, 405, 404]
+
+
+def test_bad_content_length(index):
+    async def run():
+        server = skool.MatchServer(index, "exact")
+        port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /match HTTP/1.1\r\nContent-Length: ten\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        finally:
+            await server.close()
+        return response
+
+    response = asyncio.run(run())
+
+    # the error is returned and the connection closed
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert int(head.split()[1]) == 400
+    assert "Content-Length" in json.loads(body)["error"]
+
+
+def test_bad_method(index):
+
+    with pytest.raises(ValueError):
+        skool.MatchServer(index, "minhash")
@@ -0,0 +1,71 @@
+import io
+
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def data():
+
+    # Create the data
+    left = pd.DataFrame(
+        {
+            "street": ["Washington", "Market", "Broad", None, "Washington", "Spruce"],
+            "x": range(6),
+        }
+    )
+    right = pd.DataFrame({"street": ["Washington", "Mrkt", "Brd"], "y": [4, 5, 6]})
+    return left, right
+
+
+def test_stream_exact(data):
+
+    left, right = data
+
+    # stream the left data from a CSV file, in chunks
+    chunks = pd.read_csv(io.StringIO(left.to_csv(index=False)), chunksize=4)
+    merged = list(skool.stream_merge(chunks, right, on="street"))
+
+    # test
+    assert len(merged) == 2
+    merged = pd.concat(merged)
+    assert merged["right_index"].tolist()[::4] == [0, 0]
+    assert merged["right_index"].isnull().sum() == 4
+
+
+@pytest.mark.parametrize(
+    "merge, kwargs",
+    [
+        (skool.fuzzy_merge, dict(score_cutoff=70, workers=1)),
+        (skool.tf_idf_merge, dict(score_cutoff=20)),
+        (skool.cascade, dict(stages=["exact", ("tf_idf", {"score_cutoff": 20})])),
+    ],
+)
+def test_stream_methods(data, merge, kwargs):
+
+    left, right = data
+
+    # merge all at once and in chunks
+    index = skool.MatchIndex(right, "street")
+    expected = merge(left, index, left_on="street", **kwargs)
+    chunks = (left.iloc[i : i + 2] for i in range(0, len(left), 2))
+    merged = pd.concat(skool.stream_merge(chunks, index, merge, on="street", **kwargs))
+
+    # test
+    pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
+
+
+def test_stream_left_on_index(data):
+
+    left, right = data
+    left = left.rename(columns={"street": "address"})
+
+    # the right column is taken from the index
+    index = skool.MatchIndex(right, "street")
+    chunks = (left.iloc[i : i + 2] for i in range(0, len(left), 2))
+    merged = pd.concat(skool.stream_merge(chunks, index, left_on="address"))
+
+    # test
+    expected = skool.exact_merge(left, index, left_on="address")
+    pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
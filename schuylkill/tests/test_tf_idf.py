@@ -0,0 +1,225 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+import numpy as np
+from schuylkill.tf_idf import _chunked_tf_idf, _tf_idf
+
+
+def test_tf_idf():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington St", "Market St", "Broad"], "x": [1, 2, 3]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Spruce St", "Washington Street", "Market Street"], "y": [4, 5, 6]}
+    )
+
+    # merge
+    merged = skool.tf_idf_merge(left, right, on="street", score_cutoff=50)
+
+    # test
+    assert len(merged) == len(left)
+    assert merged["right_index"].tolist()[:2] == [1, 2]
+    assert merged["match_probability"].iloc[0] > 0.5
+
+
+def test_duplicates():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Market St", "Broad St", "Market St"], "x": [1, 2, 3]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Spruce St", "Market Street", "Market Street"], "y": [4, 5, 6]}
+    )
+
+    # merge
+    merged = skool.tf_idf_merge(left, right, on="street", score_cutoff=50)
+
+    # the duplicated rows get the same match
+    assert len(merged) == len(left)
+    assert merged.loc[0, "right_index"] == merged.loc[2, "right_index"] == 1
+    assert merged.loc[0, "match_probability"] == merged.loc[2, "match_probability"]
+
+
+def test_missing_on():
+
+    # Create the data
+    left = pd.DataFrame({"street_1": ["Washington", "Market", "Broad"], "x": [1, 2, 3]})
+    right = pd.DataFrame({"street_2": ["Washington"], "y": [1]})
+
+    # missing_on
+    with pytest.raises(ValueError):
+        skool.tf_idf_merge(left, right)
+
+
+def test_first_right_row():
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Washington", "Market", "Washington"], "x": [1, 2, 3]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Washington", "Spruce", "Washingtn"], "y": [4, 5, 6]}
+    )
+
+    # merge
+    merged = skool.tf_idf_merge(
+        left, right, on="street", score_cutoff=50, max_matches=2
+    )
+
+    # the first right row matches, and left rows don't crowd out each other
+    assert merged.loc[0, "right_index"].tolist() == [0, 2]
+    assert merged.loc[2, "right_index"].tolist() == [0, 2]
+    assert merged.loc[0, "match_probability"].iloc[0] == pytest.approx(1.0)
+
+
+def test_chunk_size():
+
+    # Create the data
+    left = pd.DataFrame(
+        {
+            "street": ["Washington St", "Market St", "Broad", None, "Spruce"],
+            "x": range(5),
+        }
+    )
+    right = pd.DataFrame(
+        {"street": ["Spruce St", "Washington Street", "Market Street"], "y": [4, 5, 6]}
+    )
+
+    # merge all at once and in chunks
+    merged = skool.tf_idf_merge(left, right, on="street", score_cutoff=50)
+    chunked = skool.tf_idf_merge(
+        left, right, on="street", score_cutoff=50, chunk_size=2, workers=2
+    )
+
+    # test
+    pd.testing.assert_frame_equal(merged, chunked)
+
+    # bad chunk size
+    with pytest.raises(ValueError):
+        skool.tf_idf_merge(left, right, on="street", chunk_size=0)
+
+
+def test_chunked_vectors():
+
+    # Create the data
+    left = np.array(
+        ["Washington St", "Market St", "Walnut", "Market St."], dtype=object
+    )
+    right = np.array(["Spruce St", "Washington Street", "Market Street"], dtype=object)
+    left_weights, right_weights = np.array([1, 2, 1, 1]), np.array([1, 1, 3])
+
+    # the left vectors of a chunk give the same similarities as fitting all at once
+    _, _, matrix = _tf_idf(
+        np.concatenate([left, right]), np.concatenate([left_weights, right_weights])
+    )
+    right_matrix, transform = _chunked_tf_idf(left, left_weights, right, right_weights)
+    np.testing.assert_allclose(
+        (transform(left[1:3]) @ right_matrix.T).toarray(),
+        (matrix[1:3] @ matrix[len(left) :].T).toarray(),
+    )
+
+
+@pytest.mark.parametrize("dtype", ["category", "string"])
+def test_key_dtypes(dtype):
+
+    # Create the data
+    left = pd.DataFrame(
+        {"street": ["Market St", None, "Broad St", "Market St"], "x": [1, 2, 3, 4]}
+    )
+    right = pd.DataFrame(
+        {"street": ["Spruce St", "Market Street", None], "y": [4, 5, 6]}
+    )
+
+    # merge, directly and with an index
+    for index in [False, True]:
+        expected, merged = [
+            skool.tf_idf_merge(
+                left.astype({"street": d}),
+                skool.MatchIndex(r, on="street") if index else r,
+                on="street",
+                score_cutoff=50,
+            )
+            for d, r in [(object, right), (dtype, right.astype({"street": dtype}))]
+        ]
+
+        # test
+        columns = ["x", "match_probability", "right_index", "y"]
+        pd.testing.assert_frame_equal(merged[columns], expected[columns])
+        assert merged["right_index"].tolist()[::3] == [1, 1]
+
+
+def test_by():
+
+    # Create the data
+    left = pd.DataFrame(
+        {
+            "street": ["Market St", "Market St", "Broad St"],
+            "zip": [19103, 19104, None],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "street": ["Market Street", "Market Ave", "Broad Street"],
+            "zip": [19104, 19103, 19103],
+        }
+    )
+
+    # only rows in the same block match, and rows without a block don't match
+    merged = skool.tf_idf_merge(left, right, on="street", by="zip", score_cutoff=10)
+    assert merged["right_index"].tolist()[:2] == [1, 0]
+    assert merged["right_index"].isna().tolist() == [False, False, True]
+
+    # the similarities use the TF-IDF weights of all of the strings
+    unblocked = skool.tf_idf_merge(
+        left, right, on="street", score_cutoff=10, max_matches=3
+    ).loc[1]
+    assert merged.loc[1, "match_probability"] == pytest.approx(
+        unblocked.loc[unblocked["right_index"] == 0, "match_probability"].iloc[0]
+    )
+
+    # the blocks can be matched in separate processes
+    parallel = skool.tf_idf_merge(
+        left, right, on="street", by="zip", score_cutoff=10, workers=2
+    )
+    assert parallel["right_index"].equals(merged["right_index"])
+
+    # the number of blocking columns should match
+    with pytest.raises(ValueError):
+        skool.tf_idf_merge(
+            left, right, on="street", left_by=["zip"], right_by=["zip", "street"]
+        )
+
+
+def test_several_ons():
+
+    # Create the data
+    left = pd.DataFrame(
+        {
+            "owner": ["John Smith", "Jane Doe", None],
+            "street": ["Market St", "Broad St", "Market St"],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "owner": ["John Smith", "John Smith", "Jane Doe"],
+            "street": ["Broad Street", "Market Street", None],
+        }
+    )
+
+    # the street breaks the tie between the owners, and a missing string
+    # has a similarity of zero
+    merged = skool.tf_idf_merge(
+        left, right, on=["owner", "street"], weights=[2, 1], score_cutoff=50
+    )
+    assert merged["right_index"].tolist()[:2] == [1, 2]
+    assert merged.loc[1, "match_probability"] == pytest.approx(2 / 3)
+    assert merged["right_index"].isna().tolist() == [False, False, True]
+
+    # only candidates above the cutoff match
+    merged = skool.tf_idf_merge(
+        left, right, on=["owner", "street"], weights=[2, 1], score_cutoff=90
+    )
+    assert merged["right_index"].isna().tolist() == [False, True, True]
@@ -0,0 +1,70 @@
+import schuylkill as skool
+import pytest
+import pandas as pd
+
+
+def test_word_order():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["MARKET ST 1500", "Broad St.", "Spruce"]})
+    right = pd.DataFrame(
+        {"street": ["1500 Market Street", "1500 market st", "broad st"], "y": [1, 2, 3]}
+    )
+
+    # merge
+    merged = skool.token_merge(left, right, on="street", score_cutoff=50)
+
+    # the order of the words, their case and punctuation are ignored
+    assert merged["right_index"].tolist()[:2] == [1, 2]
+    assert merged["match_probability"].tolist()[:2] == [1.0, 1.0]
+    assert pd.isna(merged.loc[2, "right_index"])
+
+
+@pytest.mark.parametrize(
+    "similarity, probability",
+    [("jaccard", 2 / 5), ("overlap", 2 / 3), ("containment", 2 / 4)],
+)
+def test_similarity(similarity, probability):
+
+    # Create the data
+    left = pd.DataFrame({"street": ["1500 N Market Street"]})
+    right = pd.DataFrame({"street": ["Market 1500 E", "Walnut St"]})
+
+    # merge
+    merged = skool.token_merge(
+        left, right, on="street", similarity=similarity, score_cutoff=0
+    )
+
+    # test
+    assert merged["right_index"].tolist() == [0]
+    assert merged["match_probability"].iloc[0] == pytest.approx(probability)
+
+
+def test_index():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Market St", "St Broad", "Walnut"]})
+    right = pd.DataFrame({"street": ["Broad St", "Market St", "Market Street"]})
+
+    # the index gives the same matches, a chunk of strings at a time
+    merged = skool.token_merge(left, right, on="street", score_cutoff=30, max_matches=2)
+    indexed = skool.token_merge(
+        left,
+        skool.MatchIndex(right, on="street", methods=["token"]),
+        on="street",
+        score_cutoff=30,
+        max_matches=2,
+        chunk_size=1,
+    )
+    pd.testing.assert_frame_equal(merged, indexed)
+
+
+def test_bad_similarity():
+
+    # Create the data
+    left = pd.DataFrame({"street": ["Market St"]})
+    right = pd.DataFrame({"street": ["Market St"]})
+
+    # test
+    with pytest.raises(ValueError):
+        skool.token_merge(left, right, on="street", similarity="cosine")
@@ -71,6 +71,23 @@ def test_clean_strings_3():
     assert result["street"].squeeze() == "this is a"
 
 
+def test_clean_strings_columns():
+
+    # Create the data
+    left = pd.DataFrame(
+        {
+            "street": ["1234 Market St.", None, "1234 MARKET ST"],
+            "city": ["Phila, PA", "PHILA PA", "Phila  PA"],
+        }
+    )
+
+    # clean both columns at once
+    result = skool.clean_strings(left, ["street", "city"], ignored=["st", "pa"])
+    assert result["street"].tolist()[::2] == ["1234 market", "1234 market"]
+    assert result["street"].isnull().tolist() == [False, True, False]
+    assert result["city"].tolist() == ["phila"] * 3
+
+
 def test_clean_strings_error():
 
     # Create the data
@@ -79,3 +96,16 @@ def test_clean_strings_error():
     with pytest.raises(Exception):
         skool.clean_strings(left, ["x"])
 
+
+
+@pytest.mark.parametrize("dtype", ["category", "string"])
+def test_clean_strings_dtypes(dtype):
+
+    # Create the data
+    left = pd.DataFrame({"street": ["1234 Market St.", None, "1234 MARKET ST"]})
+
+    # clean, keeping the column dtype
+    result = skool.clean_strings(left.astype(dtype), ["street"], ignored=["st"])
+    assert result["street"].dtype == dtype
+    assert result["street"].tolist()[::2] == ["1234 market", "1234 market"]
+    assert result["street"].isnull().tolist() == [False, True, False]
@@ -1,56 +1,52 @@
 import re
+from collections import Counter
+from typing import Union
+
 import pandas as pd
 import numpy as np
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, diags, vstack
 import sparse_dot_topn.sparse_dot_topn as ct
-from sklearn.feature_extraction.text import TfidfVectorizer
-from .utils import pipeable
+import sparse_dot_topn.sparse_dot_topn_threaded as ct_thread
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+from .cache import MatchCache, _cached_matches, _context
+from .exact import _broadcast_matches
+from .fuzzy import _apply_by_multiprocessing
+from .index import MatchIndex, _unpack_index
+from .utils import (
+    _block_codes,
+    _block_groups,
+    _block_strings,
+    _Profile,
+    _factorize_sides,
+    pipeable,
+)
 
 __all__ = ["tf_idf_merge"]
 
 
-def _format_matches(sparse_matrix, name_vector_unique, unique_index, left_size):
+def _format_matches(sparse_matrix, left_data, right_data):
     """
-    Internal function to format the sparse matrix of matches 
-    into a pandas DataFrame.
+    Internal function to format the sparse matrix of matches between the
+    left (rows) and right (columns) strings into a pandas DataFrame.
     """
-    non_zeros = sparse_matrix.nonzero()
-
-    sparserows = non_zeros[0]
-    sparsecols = non_zeros[1]
-    nr_matches = sparsecols.size
-
-    out = []
-
-    for index in range(0, nr_matches):
-
-        # the left/right string match
-        left_side = name_vector_unique.iloc[sparserows[index]]
-        right_side = name_vector_unique.iloc[sparsecols[index]]
-
-        # the index in name vector
-        lidx = name_vector_unique.index[sparserows[index]]
-        ridx = name_vector_unique.index[sparsecols[index]]
-
-        # the original index
-        left_index = unique_index[lidx]
-        right_index = unique_index[ridx]
-
-        # similarity
-        similarity = sparse_matrix.data[index]
-
-        if lidx != ridx and lidx < left_size and ridx > left_size:
-            out.append([left_index, right_index, left_side, right_side, similarity])
+    rows, cols, similarity = _nonzero_matches(sparse_matrix.tocsr())
 
     return pd.DataFrame(
-        out,
-        columns=["left_index", "right_index", "left_side", "right_side", "similarity"],
+        {
+            "left_index": left_data.index.values[rows],
+            "right_index": right_data.index.values[cols],
+            "left_side": left_data.values[rows],
+            "right_side": right_data.values[cols],
+            "similarity": similarity,
+        }
     )
 
 
-def _fast_cossim_top(A, B, ntop, lower_bound=0):
+def _fast_cossim_top(A, B, ntop, lower_bound=0, workers=1):
     """
-    Calculate the cosine similarity for the top matches.
+    Calculate the cosine similarity for the top matches, using `workers`
+    threads.
     """
     # force A and B as a CSR matrix.
     # If they have already been CSR, there is no overhead
@@ -62,12 +58,14 @@ def _fast_cossim_top(A, B, ntop, lower_bound=0):
     idx_dtype = np.int32
 
     nnz_max = M * ntop
+    if nnz_max == 0 or A.nnz == 0 or B.nnz == 0:
+        return csr_matrix((M, N), dtype=A.dtype)
 
     indptr = np.zeros(M + 1, dtype=idx_dtype)
     indices = np.zeros(nnz_max, dtype=idx_dtype)
     data = np.zeros(nnz_max, dtype=A.dtype)
 
-    ct.sparse_dot_topn(
+    args = [
         M,
         N,
         np.asarray(A.indptr, dtype=idx_dtype),
@@ -81,9 +79,47 @@ def _fast_cossim_top(A, B, ntop, lower_bound=0):
         indptr,
         indices,
         data,
-    )
+    ]
+    if workers > 1:
+        ct_thread.sparse_dot_topn_threaded(*args, workers)
+    else:
+        ct.sparse_dot_topn(*args)
 
-    return csr_matrix((data, indices, indptr), shape=(M, N))
+    # only keep the filled part of the preallocated arrays
+    nnz = indptr[-1]
+    return csr_matrix((data[:nnz].copy(), indices[:nnz].copy(), indptr), shape=(M, N))
+
+
+def _nonzero_matches(matches):
+    """
+    Return the rows, columns and similarities of the nonzero matches in the
+    input sparse matrix of top-n matches, from its row pointers.
+    """
+    rows = np.repeat(np.arange(matches.shape[0]), np.diff(matches.indptr))
+    nonzero = matches.data != 0
+    return rows[nonzero], matches.indices[nonzero], matches.data[nonzero]
+
+
+def _match_block(block, left_matrix, right_matrix, ntop, lower_bound=0):
+    """
+    Find the most similar right strings of a block for each of the left
+    strings of the same block.
+
+    Returns
+    -------
+    left_codes, right_codes, scores : numpy.ndarray
+        the codes of the matching left and right strings, and their
+        similarity
+    """
+    left_codes, right_codes = block
+    matches = _fast_cossim_top(
+        left_matrix[left_codes],
+        right_matrix[right_codes].transpose().tocsr(),
+        ntop=ntop,
+        lower_bound=lower_bound,
+    )
+    rows, cols, similarity = _nonzero_matches(matches)
+    return left_codes[rows], right_codes[cols], similarity
 
 
 def _ngrams(string, n=3):
@@ -95,16 +131,472 @@ def _ngrams(string, n=3):
     return ["".join(ngram) for ngram in ngrams]
 
 
+def _words(string):
+    """
+    Split the input string into its lower-cased words, ignoring punctuation,
+    as :func:`fuzzywuzzy.utils.full_process` does before token scoring.
+    """
+    return re.findall(r"[^\W_]+", string.lower())
+
+
+def _tf_idf(values, weights):
+    """
+    Fit the TF-IDF vectorization to the input distinct strings, where each
+    string stands for `weights` documents when calculating the document
+    frequencies.
+
+    This matches fitting :class:`sklearn.feature_extraction.text.TfidfVectorizer`
+    to every document, while only analyzing each distinct string once.
+
+    Returns
+    -------
+    counter : CountVectorizer
+        the fitted n-gram counter
+    idf : numpy.ndarray
+        the inverse document frequency of each n-gram
+    matrix : scipy.sparse.csr_matrix
+        the normalized TF-IDF vectors of the input strings
+    """
+    counter = CountVectorizer(analyzer=_ngrams)
+    counts = counter.fit_transform(values)
+    idf = _idf((counts > 0).T @ weights, weights.sum())
+
+    return counter, idf, normalize(counts @ diags(idf)).tocsr()
+
+
+def _idf(frequency, size):
+    """
+    Return the smoothed inverse document frequency of n-grams appearing in
+    `frequency` of the `size` documents.
+    """
+    return np.log((1 + size) / (1 + frequency)) + 1
+
+
+def _chunked_tf_idf(left_values, left_weights, right_values, right_weights):
+    """
+    Fit the TF-IDF vectorization to the input distinct left and right
+    strings, as :func:`_tf_idf` does, without holding the vectors of all of
+    the left strings at once.
+
+    Only the n-grams of the right strings are kept in the vocabulary. The
+    document frequencies of the other n-grams of the left strings are kept
+    to weight them in the norms of the left vectors, as in
+    :meth:`_TfidfIndex.transform`.
+
+    Returns
+    -------
+    matrix : scipy.sparse.csr_matrix
+        the normalized TF-IDF vectors of the right strings
+    transform : callable
+        returns the normalized TF-IDF vectors of the input left strings
+    """
+    # count the n-grams of the right strings
+    vocabulary = {}
+    rows, cols, data = [], [], []
+    for i, value in enumerate(right_values):
+        for ngram, count in Counter(_ngrams(value)).items():
+            rows.append(i)
+            cols.append(vocabulary.setdefault(ngram, len(vocabulary)))
+            data.append(count)
+    counts = csr_matrix(
+        (data, (rows, cols)), shape=(len(right_values), len(vocabulary)), dtype=float
+    )
+
+    # the document frequencies, including those of the left strings
+    frequency = (counts > 0).T @ right_weights.astype(float)
+    missing = Counter()
+    for value, weight in zip(left_values, left_weights):
+        for ngram in set(_ngrams(value)):
+            col = vocabulary.get(ngram)
+            if col is None:
+                missing[ngram] += weight
+            else:
+                frequency[col] += weight
+    size = left_weights.sum() + right_weights.sum()
+    idf = _idf(frequency, size)
+
+    def transform(values):
+        rows, cols, data = [], [], []
+        squared = np.zeros(len(values))
+        for i, value in enumerate(values):
+            for ngram, count in Counter(_ngrams(value)).items():
+                col = vocabulary.get(ngram)
+                if col is None:
+                    squared[i] += (count * _idf(missing[ngram], size)) ** 2
+                else:
+                    rows.append(i)
+                    cols.append(col)
+                    data.append(count * idf[col])
+        matrix = csr_matrix(
+            (data, (rows, cols)), shape=(len(values), len(vocabulary)), dtype=float
+        )
+
+        norms = np.sqrt(
+            np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel() + squared
+        )
+        norms[norms == 0] = 1
+        return diags(1 / norms) @ matrix
+
+    return normalize(counts @ diags(idf)).tocsr(), transform
+
+
+class _TfidfIndex:
+    """
+    The TF-IDF vocabulary and normalized matrix of the distinct right strings.
+
+    The index can be updated for added and removed right strings without
+    refitting: only the new strings are analyzed, extending the vocabulary,
+    and the document frequencies are updated for the changed strings. The
+    IDF weights of all the strings are only recalculated once the number of
+    right rows drifts far enough from the number they were calculated for.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the distinct right strings to index
+    weights : numpy.ndarray
+        the number of rows holding each string
+    """
+
+    def __init__(self, values, weights):
+        self.counter = CountVectorizer(analyzer=_ngrams)
+        self.counts = self.counter.fit_transform(values).tocsr()
+        self.weights = weights
+        self.frequency = (self.counts > 0).T @ weights.astype(float)
+        self._reweight()
+
+    def _reweight(self):
+        """
+        Recalculate the IDF weights and the normalized matrix.
+        """
+        self.size = self.weights.sum()
+        self.idf = _idf(self.frequency, self.size)
+        self.matrix = normalize(self.counts @ diags(self.idf)).tocsr()
+
+    def _count(self, values):
+        """
+        Count the n-grams of the input strings, adding any new n-grams to the
+        vocabulary.
+        """
+        vocabulary = self.counter.vocabulary_
+        rows, cols, data = [], [], []
+        for i, value in enumerate(values):
+            for ngram, count in Counter(_ngrams(value)).items():
+                rows.append(i)
+                cols.append(vocabulary.setdefault(ngram, len(vocabulary)))
+                data.append(count)
+
+        return csr_matrix(
+            (data, (rows, cols)), shape=(len(values), len(vocabulary)), dtype=np.int64
+        )
+
+    def update(self, weights, values=(), keep=None, idf_tolerance=0.1):
+        """
+        Update the index for changes to the right strings.
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            the number of rows holding each of the updated distinct strings
+        values : sequence of str, optional
+            the new distinct strings, added after the existing strings
+        keep : numpy.ndarray, optional
+            the positions of the existing strings to keep, in their new order;
+            by default, all of them are kept
+        idf_tolerance : float, optional
+            the IDF weights of all the strings are recalculated when the
+            number of right rows differs from the number they were last
+            calculated for by more than this fraction; otherwise, only the
+            new strings are weighted, with the existing IDF weights
+        """
+        # the change in the number of rows holding each existing string
+        delta = -self.weights.astype(float)
+        if keep is None:
+            delta += weights[: len(delta)]
+        else:
+            delta[keep] += weights[: len(keep)]
+        changed = np.flatnonzero(delta)
+        self.frequency = self.frequency + (self.counts[changed] > 0).T @ delta[changed]
+
+        # drop the removed strings
+        if keep is not None:
+            self.counts = self.counts[keep]
+            self.matrix = self.matrix[keep]
+        self.weights = weights
+
+        # analyze the new strings, extending the vocabulary
+        new_counts = self._count(values)
+        new_weights = weights[self.counts.shape[0] :].astype(float)
+        size = new_counts.shape[1]
+        self.frequency = np.concatenate(
+            [self.frequency, np.zeros(size - len(self.frequency))]
+        )
+        self.frequency += (new_counts > 0).T @ new_weights
+        if len(values):
+            self.counts = vstack(
+                [_with_columns(self.counts, size), new_counts], format="csr"
+            )
+
+        if abs(weights.sum() - self.size) > idf_tolerance * self.size:
+            self._reweight()
+        elif len(values):
+            # weight the new n-grams, keeping the existing IDF weights
+            self.idf = np.concatenate(
+                [self.idf, _idf(self.frequency[len(self.idf) :], self.size)]
+            )
+            self.matrix = vstack(
+                [
+                    _with_columns(self.matrix, size),
+                    normalize(new_counts @ diags(self.idf)),
+                ],
+                format="csr",
+            )
+
+    def transform(self, values):
+        """
+        Calculate the normalized TF-IDF vectors of the input strings.
+
+        N-grams missing from the vocabulary are dropped from the vectors but
+        still count towards their norm, so they lower the similarity with
+        the right strings.
+        """
+        vocabulary = self.counter.vocabulary_
+        matrix = self.counter.transform(values) @ diags(self.idf)
+
+        # the squared weight of the n-grams missing from the vocabulary
+        missing = np.array(
+            [
+                sum(
+                    count ** 2
+                    for ngram, count in Counter(_ngrams(value)).items()
+                    if ngram not in vocabulary
+                )
+                for value in values
+            ],
+            dtype=float,
+        )
+        missing *= (np.log(1 + self.size) + 1) ** 2
+
+        norms = np.sqrt(
+            np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel() + missing
+        )
+        norms[norms == 0] = 1
+        return diags(1 / norms) @ matrix
+
+
+def _with_columns(matrix, size):
+    """
+    Return the input CSR matrix with extra empty columns, up to `size`.
+    """
+    return csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], size)
+    )
+
+
+def _tf_idf_matches(
+    left_values,
+    right,
+    right_on,
+    index=None,
+    score_cutoff=90,
+    max_matches=1,
+    chunk_size=None,
+    workers=1,
+    cache=None,
+    left_blocks=None,
+    right_blocks=None,
+    profiler=None,
+):
+    """
+    Internal function to match the input left strings to the right data,
+    only within the same block if the block codes of the left and right
+    rows are given.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if cache is not None and index is None:
+        raise ValueError("`right` should be a MatchIndex to use the `cache`")
+    if cache is not None and left_blocks is not None:
+        raise ValueError("the `cache` can't be used when matching within blocks")
+
+    if profiler is None:
+        profiler = _Profile()
+
+    # the distinct left and right strings
+    left_side, right_side = _factorize_sides(left_values, right, right_on, index)
+    left_pos, left_codes, left_unique = left_side
+    right_pos, right_codes, right_unique = right_side
+    profiler.lap("factorize")
+
+    # Do the TF-IDF vectorization of the distinct strings
+    if index is not None:
+        tf_idf = index.build("tf_idf")
+        right_rows = tf_idf.matrix
+
+        def left_matrix(positions):
+            return tf_idf.transform(left_unique[positions])
+
+    elif chunk_size is not None and left_blocks is None:
+        # fit the vocabulary to the left and right strings together, and
+        # only vectorize the left strings a chunk at a time
+        right_rows, transform = _chunked_tf_idf(
+            left_unique,
+            np.bincount(left_codes, minlength=len(left_unique)),
+            right_unique,
+            np.bincount(right_codes, minlength=len(right_unique)),
+        )
+
+        def left_matrix(positions):
+            return transform(left_unique[positions])
+
+    else:
+        # fit the vocabulary to the left and right strings together
+        weights = np.concatenate(
+            [
+                np.bincount(left_codes, minlength=len(left_unique)),
+                np.bincount(right_codes, minlength=len(right_unique)),
+            ]
+        )
+        _, _, tf_idf_matrix = _tf_idf(
+            np.concatenate([left_unique, right_unique]), weights
+        )
+        right_rows = tf_idf_matrix[len(left_unique) :]
+
+        def left_matrix(positions):
+            return tf_idf_matrix[positions]
+
+    profiler.lap("vectorize")
+
+    # match each distinct (block, string) pair as a separate string, with
+    # the TF-IDF weights of the string across all blocks
+    if left_blocks is not None:
+        left_pos, left_codes, left_strings, left_pair_blocks = _block_strings(
+            left_pos, left_codes, left_unique, left_blocks
+        )
+        right_pos, right_codes, right_strings, right_pair_blocks = _block_strings(
+            right_pos, right_codes, right_unique, right_blocks
+        )
+        profiler.lap("factorize")
+
+    def match_blocks():
+        # get the matches within each block
+        blocks = _block_groups(left_pair_blocks, right_pair_blocks)
+        block_matches = _apply_by_multiprocessing(
+            blocks,
+            _match_block,
+            dict(
+                left_matrix=left_matrix(np.arange(len(left_unique)))[left_strings],
+                right_matrix=right_rows[right_strings],
+            ),
+            workers=workers,
+            ntop=max_matches,
+            lower_bound=score_cutoff / 100,
+        )
+        profiler.count(blocks=len(blocks))
+        profiler.lap("sparse_product")
+
+        found = [(np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0))]
+        left_found, right_found, scores = map(
+            np.concatenate, zip(*(found + block_matches))
+        )
+        return pd.DataFrame(
+            {"left_code": left_found, "right_code": right_found, "score": scores}
+        )
+
+    def match(positions):
+        right_matrix = right_rows.transpose().tocsr()
+        right_series = pd.Series(right_unique, dtype=object)
+
+        # Get the matches between the left and right strings, a block of left
+        # strings at a time
+        size = chunk_size or max(len(positions), 1)
+        found = []
+        for start in range(0, max(len(positions), 1), size):
+            chunk = positions[start : start + size]
+            chunk_matrix = left_matrix(chunk)
+            profiler.lap("vectorize")
+
+            matches = _fast_cossim_top(
+                chunk_matrix,
+                right_matrix,
+                ntop=max_matches,
+                lower_bound=score_cutoff / 100,
+                workers=workers,
+            )
+            profiler.lap("sparse_product")
+
+            found.append(
+                _format_matches(
+                    matches,
+                    pd.Series(left_unique[chunk], index=chunk, dtype=object),
+                    right_series,
+                )
+            )
+            profiler.lap("format_matches")
+        return pd.concat(found, ignore_index=True).rename(
+            columns={
+                "left_index": "left_code",
+                "right_index": "right_code",
+                "similarity": "score",
+            }
+        )
+
+    # match the distinct left strings missing from the cache
+    context = None
+    if cache is not None:
+        context = _context(
+            "tf_idf",
+            right_unique,
+            tf_idf.idf,
+            score_cutoff=score_cutoff,
+            max_matches=max_matches,
+        )
+    if left_blocks is not None:
+        matches_df, hits = match_blocks(), 0
+    else:
+        matches_df, hits = _cached_matches(cache, context, left_unique, match)
+
+    # broadcast the matches back to the left and right rows
+    matches = _broadcast_matches(
+        matches_df, left_pos, left_codes, right_pos, right_codes, max_matches, scale=1
+    )
+    profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left_values),
+        left_unique=len(left_unique),
+        right_rows=len(right),
+        right_unique=len(right_unique),
+        cache_hits=hits,
+        matched_pairs=len(matches_df),
+        matches=len(matches),
+    )
+    return matches
+
+
 @pipeable
 def tf_idf_merge(
     left: pd.DataFrame,
-    right: pd.DataFrame,
-    on: str = None,
-    left_on: str = None,
-    right_on: str = None,
+    right: Union[pd.DataFrame, MatchIndex],
+    on: Union[str, list] = None,
+    left_on: Union[str, list] = None,
+    right_on: Union[str, list] = None,
     score_cutoff: int = 90,
     max_matches=1,
+    chunk_size: int = None,
+    workers: int = 1,
+    cache: MatchCache = None,
+    by: Union[str, list] = None,
+    left_by: Union[str, list] = None,
+    right_by: Union[str, list] = None,
+    weights: list = None,
+    max_candidates: int = 10,
     suffixes=("_x", "_y"),
+    profile: bool = False,
 ):
     """
     Merge two dataframes based on a fuzzy matching between two string columns.
@@ -114,92 +606,148 @@ def tf_idf_merge(
     -   This performs a "left" merge — all rows in the left data frame will be 
         present in the returned data frame
     -   Data in the left data frame can match multiple values in the right column.
+    -   Setting `chunk_size` bounds the memory used by vectorizing and
+        matching the distinct left strings against the right strings in blocks.
 
     Parameters
     ----------
     left : pandas.DataFrame
         the left data to merge
-    right : pandas.DataFrame
-        the right DataFrame to merge
-    on : str, optional
-        the column to merge on
-    left_on : str, optional
-        the name of the string column in the left data frame to merge on
-    right_on : str, optional
-        the name of the string column in the right data frame to merge on
-    workers : int, optional
-        the number of processes to apply
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    on : str or list of str, optional
+        the column(s) to merge on
+    left_on : str or list of str, optional
+        the name(s) of the string column(s) in the left data frame to merge on
+    right_on : str or list of str, optional
+        the name(s) of the string column(s) in the right data frame to merge on
     score_cutoff : int, optional
         only match strings that score above this threshold
-    scorer : callable, optional
-        the fuzzywuzzy function to use to score the matches
     max_matches : int, optional
         the maximum number of matches to identify per row
+    chunk_size : int, optional
+        the number of distinct left strings to vectorize and match at a time;
+        by default, all strings are matched at once
+    workers : int, optional
+        the number of threads to calculate the similarities with, or, when
+        matching within blocks, the number of processes matching the blocks
+    cache : MatchCache, optional
+        a persistent cache of the matches of distinct left strings; only the
+        strings missing from it are matched. This requires `right` to be a
+        :class:`MatchIndex`, since otherwise the TF-IDF weights depend on
+        the left strings.
+    by : str or list of str, optional
+        the blocking column(s); only rows with the same values in these
+        columns are matched, and each block is matched separately. The
+        TF-IDF weights are still calculated over all of the strings.
+    left_by : str or list of str, optional
+        the blocking column(s) in the left data frame
+    right_by : str or list of str, optional
+        the blocking column(s) in the right data frame
+    weights : list of float, optional
+        when merging on several columns, the weight of each column in the
+        match probability, which is the weighted mean of the similarities of
+        the columns; by default, the columns are weighted equally
+    max_candidates : int, optional
+        when merging on several columns, the number of the most similar
+        right strings, in the column with the most distinct right strings,
+        to consider as candidate matches for each left string
     suffixes : tuple of (str, str), default ('_x', '_y')
         Suffix to apply to overlapping column names in the left and right
         side, respectively. To raise an exception on overlapping columns use
         (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
 
     Returns
     -------
     merged : pandas.DataFrame
-        the merged dataframe containg all rows in `left` and any matched data 
+        the merged dataframe containg all rows in `left` and any matched data
         from the `right` data frame
     """
     if on is not None:
         left_on = right_on = on
+    if by is not None:
+        left_by = right_by = by
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
 
     # Verify input parameters
     if left_on is None or right_on is None:
         raise ValueError("Please specify `on` or `left_on/right_on`")
-    if left_on not in left.columns:
+    multi = isinstance(left_on, list) or isinstance(right_on, list)
+    if not multi and left_on not in left.columns:
         raise ValueError(f"'{left_on}' is not a column in `left`")
-    if right_on not in right.columns:
+    if not multi and right_on not in right.columns:
         raise ValueError(f"'{right_on}' is not a column in `right`")
+    if multi and (cache is not None or left_by is not None or right_by is not None):
+        raise ValueError(
+            "`cache` and `by` can't be used when merging on several columns"
+        )
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("`chunk_size` should be a positive integer")
 
-    # get the left and right strings
-    left_data = left[left_on].dropna().astype(str)
-    right_data = right[right_on].dropna().astype(str).rename_axis("right_index")
-
-    # Merge together into single Series
-    all_data = pd.concat([left_data, right_data], axis=0)
+    # the blocks of the left and right rows
+    left_blocks = right_blocks = None
+    if left_by is not None or right_by is not None:
+        left_blocks, right_blocks = _block_codes(left, right, left_by, right_by)
 
-    # save the index and then reset it
-    all_data_index = all_data.index
-    all_data = all_data.reset_index(drop=True)
+    # get the matches
+    profiler = _Profile()
+    if multi:
+        from .multi import _multi_matches
 
-    # Do the TF-IDF vectorization
-    vectorizer = TfidfVectorizer(min_df=1, analyzer=_ngrams)
-    tf_idf_matrix = vectorizer.fit_transform(all_data.values)
+        matches = _multi_matches(
+            left,
+            right,
+            left_on,
+            right_on,
+            "tf_idf",
+            weights=weights,
+            score_cutoff=score_cutoff,
+            max_matches=max_matches,
+            max_candidates=max_candidates,
+            chunk_size=chunk_size,
+            workers=workers,
+            profiler=profiler,
+        )
+    else:
+        matches = _tf_idf_matches(
+            left[left_on],
+            right,
+            right_on,
+            index,
+            score_cutoff=score_cutoff,
+            max_matches=max_matches,
+            chunk_size=chunk_size,
+            workers=workers,
+            cache=cache,
+            left_blocks=left_blocks,
+            right_blocks=right_blocks,
+            profiler=profiler,
+        )
 
-    # Get the matches as a sparse matrix
-    matches = _fast_cossim_top(
-        tf_idf_matrix,
-        tf_idf_matrix.transpose(),
-        ntop=max_matches + 1,
-        lower_bound=score_cutoff / 100,
+    # Merge in the right
+    right = right.rename_axis("right_index").reset_index()
+    merged = (
+        right.iloc[matches["right_pos"]]
+        .assign(match_probability=matches["match_probability"].values)
+        .set_index(left.index[matches["left_pos"]])
     )
 
-    # Format the matches into a DataFrame
-    left_size = len(left_data)
-    matches_df = _format_matches(matches, all_data, all_data_index, left_size)
-
-    # Merge in the right
-    matches_df = (
-        pd.merge(
-            left,
-            pd.merge(
-                matches_df,
-                right.rename_axis("right_index").reset_index(),
-                on="right_index",
-            ).set_index("left_index"),
-            how="left",
-            left_index=True,
-            right_index=True,
-            suffixes=suffixes,
-        )
-        .drop(labels=["left_side", "right_side"], axis=1)
-        .rename(columns={"similarity": "match_probability"})
+    merged = pd.merge(
+        left,
+        merged.loc[:, ["right_index", "match_probability", *right.columns[1:]]],
+        how="left",
+        left_index=True,
+        right_index=True,
+        suffixes=suffixes,
     )
+    profiler.lap("merge")
 
-    return matches_df
+    if profile:
+        profiler.attach(merged, "tf_idf_merge")
+    return merged
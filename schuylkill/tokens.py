@@ -0,0 +1,325 @@
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, diags
+
+from .exact import _broadcast_matches
+from .fuzzy import _merge_matches
+from .index import MatchIndex, _unpack_index
+from .tf_idf import _fast_cossim_top, _nonzero_matches, _words
+from .utils import _Profile, _factorize_sides, pipeable
+
+__all__ = ["token_merge"]
+
+# the similarities of the word sets of two strings, from the number of
+# shared words and the numbers of words in the left and right strings
+_SIMILARITIES = {
+    "jaccard": lambda shared, left, right: shared / (left + right - shared),
+    "overlap": lambda shared, left, right: shared / np.minimum(left, right),
+    "containment": lambda shared, left, right: shared / left,
+}
+
+
+class _TokenIndex:
+    """
+    The binary word matrix of the distinct right strings, grouped by their
+    number of distinct words.
+
+    Within a group, each of the similarities increases with the number of
+    words shared with a left string, so the best matches of a group can be
+    found with the top-n sparse product, weighting the left words so that
+    the product is the similarity, or for 'jaccard', bounds it from above.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the distinct right strings to index
+    """
+
+    def __init__(self, values):
+        self.vocabulary = {}
+        matrix, sizes = self.transform(values, extend=True)
+
+        # the right strings with each number of words, as matrix columns
+        self.groups = {}
+        for size in np.unique(sizes[sizes > 0]):
+            codes = np.flatnonzero(sizes == size)
+            self.groups[int(size)] = (codes, matrix[codes].transpose().tocsr())
+
+    def transform(self, values, extend=False):
+        """
+        Return the binary word matrix of the input strings, and their
+        numbers of distinct words, including any words missing from the
+        vocabulary.
+        """
+        rows, cols, sizes = [], [], np.zeros(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            words = set(_words(value))
+            sizes[i] = len(words)
+            for word in words:
+                if extend:
+                    col = self.vocabulary.setdefault(word, len(self.vocabulary))
+                else:
+                    col = self.vocabulary.get(word)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+
+        matrix = csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(values), len(self.vocabulary)),
+        )
+        return matrix, sizes
+
+    def matches(
+        self,
+        matrix,
+        sizes,
+        similarity="jaccard",
+        score_cutoff=90,
+        max_matches=1,
+        workers=1,
+    ):
+        """
+        Find the most similar right strings of each of the input left
+        strings.
+
+        Parameters
+        ----------
+        matrix, sizes :
+            the word matrix of the left strings, and their numbers of words,
+            from :meth:`transform`
+
+        Returns
+        -------
+        found : pandas.DataFrame
+            the "left_code", "right_code" and "score" (from 0 to 100) of the
+            matches
+        """
+        lower_bound = score_cutoff / 100
+
+        found = [(np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0))]
+        for size, (codes, right_matrix) in self.groups.items():
+            # weight the left words so that the product is the similarity for
+            # "overlap" and "containment", and bounds it from above otherwise
+            words = np.minimum(sizes, size) if similarity == "overlap" else sizes
+            weights = np.divide(1.0, words, out=np.zeros(len(words)), where=words > 0)
+
+            matches = _fast_cossim_top(
+                diags(weights) @ matrix,
+                right_matrix,
+                ntop=max_matches,
+                lower_bound=lower_bound - 1e-9,
+                workers=workers,
+            )
+
+            # the exact similarity, from the number of shared words
+            rows, cols, products = _nonzero_matches(matches)
+            shared = np.rint(products / weights[rows])
+            scores = _SIMILARITIES[similarity](shared, sizes[rows], size)
+            keep = scores >= lower_bound
+            found.append((rows[keep], codes[cols[keep]], 100 * scores[keep]))
+
+        # keep the best matches across the groups
+        left_codes, right_codes, scores = map(np.concatenate, zip(*found))
+        return (
+            pd.DataFrame(
+                {"left_code": left_codes, "right_code": right_codes, "score": scores}
+            )
+            .sort_values(["score", "right_code"], ascending=[False, True])
+            .groupby("left_code", sort=False)
+            .head(max_matches)
+            .reset_index(drop=True)
+        )
+
+
+def _token_matches(
+    left_values,
+    right,
+    right_on,
+    index=None,
+    similarity="jaccard",
+    score_cutoff=90,
+    max_matches=1,
+    chunk_size=None,
+    workers=1,
+    profiler=None,
+):
+    """
+    Internal function to match the input left strings to the right data.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        the positions of the matching left and right rows, in the
+        "left_pos" and "right_pos" columns, and the "match_probability"
+    """
+    if similarity not in _SIMILARITIES:
+        raise ValueError(f"similarity should be one of: {', '.join(_SIMILARITIES)}")
+
+    if profiler is None:
+        profiler = _Profile()
+
+    # the distinct left and right strings
+    left_side, right_side = _factorize_sides(left_values, right, right_on, index)
+    left_pos, left_codes, left_unique = left_side
+    right_pos, right_codes, right_unique = right_side
+    profiler.lap("factorize")
+
+    # the word matrices of the left and right strings
+    if index is not None:
+        tokens = index.build("token")
+    else:
+        tokens = _TokenIndex(right_unique)
+    matrix, sizes = tokens.transform(left_unique)
+    profiler.lap("vectorize")
+
+    # get the matches, a block of left strings at a time
+    size = chunk_size or max(len(left_unique), 1)
+    found = []
+    for start in range(0, max(len(left_unique), 1), size):
+        chunk = tokens.matches(
+            matrix[start : start + size],
+            sizes[start : start + size],
+            similarity=similarity,
+            score_cutoff=score_cutoff,
+            max_matches=max_matches,
+            workers=workers,
+        )
+        found.append(chunk.assign(left_code=chunk["left_code"] + start))
+    found = pd.concat(found, ignore_index=True)
+    profiler.lap("sparse_product")
+
+    # broadcast the matches back to the left and right rows
+    matches = _broadcast_matches(
+        found, left_pos, left_codes, right_pos, right_codes, max_matches
+    )
+    profiler.lap("broadcast")
+
+    profiler.count(
+        left_rows=len(left_values),
+        left_unique=len(left_unique),
+        right_rows=len(right),
+        right_unique=len(right_unique),
+        matched_pairs=len(found),
+        matches=len(matches),
+    )
+    return matches
+
+
+@pipeable
+def token_merge(
+    left: pd.DataFrame,
+    right: Union[pd.DataFrame, MatchIndex],
+    on: str = None,
+    left_on: str = None,
+    right_on: str = None,
+    similarity: str = "jaccard",
+    score_cutoff: int = 90,
+    max_matches=1,
+    chunk_size: int = None,
+    workers: int = 1,
+    suffixes=("_x", "_y"),
+    profile: bool = False,
+):
+    """
+    Merge two dataframes based on the words shared by two string columns,
+    ignoring the order of the words.
+
+    Each string is split into its set of lower-cased words, and the
+    similarity of the word sets is calculated for all pairs of strings at
+    once, with sparse matrix products. This handles the same reordered and
+    missing words as :func:`fuzz.token_set_ratio` and
+    :func:`fuzz.token_sort_ratio`, at the speed of :func:`tf_idf_merge`.
+
+    Notes
+    -----
+    -   This performs a "left" merge — all rows in the left data frame will be
+        present in the returned data frame
+    -   Data in the left data frame can match multiple values in the right column.
+    -   Strings without any words in common never match.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+        the left data to merge
+    right : pandas.DataFrame or MatchIndex
+        the right DataFrame to merge, or a prebuilt index of it
+    on : str, optional
+        the column to merge on
+    left_on : str, optional
+        the name of the string column in the left data frame to merge on
+    right_on : str, optional
+        the name of the string column in the right data frame to merge on
+    similarity : str, optional
+        the similarity of the word sets of the left and right strings, one of
+        'jaccard' (the shared words as a fraction of all the words),
+        'overlap' (the shared words as a fraction of the words of the
+        shorter string), or 'containment' (the fraction of the left words
+        found in the right string)
+    score_cutoff : int, optional
+        only match strings with a similarity, from 0 to 100, above this
+        threshold
+    max_matches : int, optional
+        the maximum number of matches to identify per row
+    chunk_size : int, optional
+        the number of distinct left strings to match at a time; by default,
+        all strings are matched at once
+    workers : int, optional
+        the number of threads to calculate the similarities with
+    suffixes : tuple of (str, str), default ('_x', '_y')
+        Suffix to apply to overlapping column names in the left and right
+        side, respectively. To raise an exception on overlapping columns use
+        (False, False).
+    profile : bool, optional
+        whether to record the wall time of each internal stage, along with
+        the number of rows, distinct strings and pairs of strings processed,
+        in the "profile" entry of the `attrs` of the returned data frame
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        the merged dataframe containg all rows in `left` and any matched data
+        from the `right` data frame
+    """
+    if on is not None:
+        left_on = right_on = on
+
+    # Use the prebuilt index, if provided
+    right, right_on, index = _unpack_index(right, right_on)
+
+    # Verify input parameters
+    if left_on is None or right_on is None:
+        raise ValueError("Please specify `on` or `left_on/right_on`")
+    if left_on not in left.columns:
+        raise ValueError(f"'{left_on}' is not a column in `left`")
+    if right_on not in right.columns:
+        raise ValueError(f"'{right_on}' is not a column in `right`")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("`chunk_size` should be a positive integer")
+
+    # Make sure no duplicates in left index
+    if left.index.duplicated().sum():
+        raise ValueError("`left` dataframe has duplicate indices")
+
+    # get the matches
+    profiler = _Profile()
+    matches = _token_matches(
+        left[left_on],
+        right,
+        right_on,
+        index,
+        similarity=similarity,
+        score_cutoff=score_cutoff,
+        max_matches=max_matches,
+        chunk_size=chunk_size,
+        workers=workers,
+        profiler=profiler,
+    )
+    out = _merge_matches(left, right, matches, suffixes)
+    profiler.lap("merge")
+
+    if profile:
+        profiler.attach(out, "token_merge")
+    return out
@@ -1,27 +1,218 @@
 import inspect
+import logging
+import re
 import string
+import time
+import typing
 import warnings
 from functools import wraps
 
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger("schuylkill")
 
-def _remove_punctuation(s):
-    """Remove punctuation from the input string."""
-    translator = str.maketrans("", "", string.punctuation)
-    return s.translate(translator)
+# matches any punctuation character
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+
+def _factorize(values):
+    """
+    Factorize the non-missing values of the input Series.
+
+    Categorical columns are factorized through their integer codes, and
+    string columns (including Arrow-backed ones) through their arrays, so
+    only the distinct values are converted to Python objects.
+
+    Returns
+    -------
+    positions : numpy.ndarray
+        the positions of the non-missing values
+    codes : numpy.ndarray
+        the code of each non-missing value
+    uniques : numpy.ndarray
+        the distinct values, in order of first appearance, as objects
+    """
+    valid = values.notna().to_numpy()
+    positions = np.flatnonzero(valid)
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, first = pd.factorize(values.cat.codes.to_numpy()[positions])
+        uniques = values.cat.categories.to_numpy(dtype=object)[first]
+    else:
+        codes, uniques = pd.factorize(values.array[positions])
+        uniques = np.asarray(uniques, dtype=object)
+
+    return positions, codes, uniques
+
+
+def _factorize_strings(values):
+    """
+    Factorize the non-missing values of the input Series as strings, as
+    ``pd.factorize(values.dropna().astype(str))`` would, but converting only
+    the distinct values to strings.
+
+    Returns
+    -------
+    positions, codes, uniques : numpy.ndarray
+        the positions of the non-missing values, their codes, and the
+        distinct strings
+    """
+    positions, codes, uniques = _factorize(values)
+
+    # distinct values may have the same string, e.g., 1 and "1"
+    string_codes, strings = pd.factorize(uniques.astype(str))
+    return positions, string_codes[codes], np.asarray(strings, dtype=object)
+
+
+def _factorize_sides(left_values, right, right_on, index=None):
+    """
+    Factorize the left strings and the right strings to merge, reusing the
+    factorized strings of the prebuilt index of the right data, if any.
+
+    Returns
+    -------
+    left, right : tuple of numpy.ndarray
+        the positions, codes and distinct strings of each side, from
+        :func:`_factorize_strings`
+    """
+    left = _factorize_strings(left_values)
+    if index is not None:
+        return left, (index.positions, index.codes, index.uniques)
+    return left, _factorize_strings(right[right_on])
+
+
+def _block_codes(left, right, left_by, right_by):
+    """
+    Return the code of the blocking key of each left and right row, where
+    rows share a code only if they have the same values in all of the `by`
+    columns; rows with any missing value have code -1.
+    """
+    if left_by is None or right_by is None:
+        raise ValueError("Please specify `by` or `left_by/right_by`")
+    if isinstance(left_by, str):
+        left_by = [left_by]
+    if isinstance(right_by, str):
+        right_by = [right_by]
+
+    # Check the inputs
+    if len(left_by) != len(right_by) or not len(left_by):
+        raise ValueError("`left_by` and `right_by` should have the same length")
+    if not all(col in left.columns for col in left_by):
+        raise ValueError("Some of the `by` columns are not present in `left`")
+    if not all(col in right.columns for col in right_by):
+        raise ValueError("Some of the `by` columns are not present in `right`")
+
+    # combine the codes of each column
+    codes = np.zeros(len(left) + len(right), dtype=np.int64)
+    missing = np.zeros(len(codes), dtype=bool)
+    for left_col, right_col in zip(left_by, right_by):
+        key_codes, keys = pd.factorize(
+            pd.concat([left[left_col], right[right_col]], ignore_index=True).to_numpy()
+        )
+        missing |= key_codes < 0
+        codes = pd.factorize(codes * len(keys) + key_codes)[0]
+
+    codes[missing] = -1
+    return codes[: len(left)], codes[len(left) :]
+
+
+def _block_strings(positions, codes, uniques, blocks):
+    """
+    Factorize the (block, distinct string) pairs of the rows with a
+    blocking key, so that each pair is matched as a separate string.
+
+    Returns
+    -------
+    positions, codes : numpy.ndarray
+        the positions of the rows with a blocking key, and the code of their
+        pair
+    strings, pair_blocks : numpy.ndarray
+        the code of the distinct string and the block of each pair
+    """
+    n = max(len(uniques), 1)
+    blocks = blocks[positions]
+    valid = blocks >= 0
+    codes, pairs = pd.factorize(blocks[valid] * n + codes[valid])
+    return positions[valid], codes, pairs % n, pairs // n
+
+
+def _block_groups(left_blocks, right_blocks):
+    """
+    Group the left and right distinct strings by block, for the blocks
+    on both sides.
+
+    Returns
+    -------
+    groups : list of tuple
+        the positions of the left and right strings in each block, with the
+        largest blocks first
+    """
+    left_order = np.argsort(left_blocks, kind="stable")
+    right_order = np.argsort(right_blocks, kind="stable")
+    left_sorted, right_sorted = left_blocks[left_order], right_blocks[right_order]
+
+    # the range of the sorted strings in each block
+    shared = np.intersect1d(left_blocks, right_blocks)
+    left_starts = np.searchsorted(left_sorted, shared, side="left")
+    left_stops = np.searchsorted(left_sorted, shared, side="right")
+    right_starts = np.searchsorted(right_sorted, shared, side="left")
+    right_stops = np.searchsorted(right_sorted, shared, side="right")
+
+    # start with the largest blocks, to balance the load across workers
+    sizes = (left_stops - left_starts) * (right_stops - right_starts)
+    return [
+        (
+            left_order[left_starts[i] : left_stops[i]],
+            right_order[right_starts[i] : right_stops[i]],
+        )
+        for i in np.argsort(-sizes, kind="stable")
+    ]
+
+
+def _ignored_words(ignored):
+    """
+    Compile a regex matching any of the ignored words as a whole
+    (whitespace-separated) word.
+    """
+    words = sorted(set(ignored), key=len, reverse=True)
+    return re.compile(
+        r"(?<!\S)(?:" + "|".join(re.escape(w) for w in words) + r")(?!\S)"
+    )
+
+
+def _clean_values(values, remove_punctuation=True, ignored=[]):
+    """
+    Clean the input array of distinct strings.
+    """
+    # Make lower-cased and remove spaces
+    X = pd.Series(values, dtype=object).str.lower().str.strip()
+
+    # Remove punctuation
+    if remove_punctuation:
+        X = X.str.replace(_PUNCTUATION, "", regex=True)
+
+    # Remove ignored words
+    if len(ignored):
+        X = X.str.replace(_ignored_words(ignored), "", regex=True)
+
+    # Collapse the remaining whitespace
+    return X.str.replace(r"\s+", " ", regex=True).str.strip().values
 
 
 def clean_strings(df, cols, remove_punctuation=True, ignored=[]):
     """
     Clean the specified string columns in the input data frame.
 
+    Each distinct string is only cleaned once, even if it appears in
+    several rows or columns.
+
     Parameters
     ----------
     df : DataFrame
         the input data
-    cols : list of str
-        the list of column names to clean; these should all be string types
+    cols : str or list of str
+        the column name(s) to clean; these should all be string types
     remove_punctuation : bool, optional
         whether or not to remove punctuation from the strings
     ignored : list of str, optional
@@ -33,6 +224,9 @@ def clean_strings(df, cols, remove_punctuation=True, ignored=[]):
         a copy of `df` with the specified columns cleaned
 
     """
+    if isinstance(cols, str):
+        cols = [cols]
+
     # Check the inputs
     if not all(col in df.columns for col in cols):
         raise ValueError("Some of the input columns are not present in the data frame")
@@ -41,25 +235,86 @@ def clean_strings(df, cols, remove_punctuation=True, ignored=[]):
 
     # Return a copy
     out = df.copy()
+    if not len(cols):
+        return out
 
-    # Format each specified column
-    for col in cols:
+    # Clean the distinct values of all columns in one pass
+    factorized = [_factorize(df[col]) for col in cols]
+    codes, uniques = pd.factorize(
+        np.concatenate([col_uniques for _, _, col_uniques in factorized])
+    )
+    cleaned = _clean_values(uniques, remove_punctuation, ignored)
 
-        # Make lower-cased and remove spaces
-        X = out[col].dropna().str.lower().str.strip()
+    # Map the cleaned values back to each column, keeping its dtype
+    start = 0
+    for col, (positions, col_codes, col_uniques) in zip(cols, factorized):
+        col_cleaned = cleaned[codes[start : start + len(col_uniques)]]
+        start += len(col_uniques)
 
-        # Remove punctuation
-        if remove_punctuation:
-            X = X.apply(_remove_punctuation)
+        # missing values have code -1
+        row_codes = np.full(len(df), -1, dtype=np.int64)
+        row_codes[positions] = col_codes
 
-        # Remove ignored words
-        out[col] = X.apply(
-            lambda x: " ".join([w for w in x.split() if w not in ignored])
-        ).str.strip()
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # distinct values may be cleaned to the same category
+            category_codes, categories = pd.factorize(col_cleaned)
+            category_codes = np.append(category_codes, -1)
+            values = pd.Categorical.from_codes(
+                category_codes[row_codes], categories=categories
+            )
+        elif isinstance(dtype, pd.StringDtype):
+            values = pd.array(col_cleaned, dtype=dtype).take(row_codes, allow_fill=True)
+        else:
+            values = np.append(col_cleaned, np.nan)[row_codes]
+        out[col] = pd.Series(values, index=df.index)
 
     return out
 
 
+class _Profile:
+    """
+    Record the wall time of the internal stages of a merge, and counts of
+    the rows, distinct keys and pairs of strings processed.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.counts = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Add the time since the last lap to the input stage."""
+        now = time.perf_counter()
+        self.times[stage] = self.times.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, **counts):
+        """Add to the input counts."""
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def to_dict(self):
+        """The recorded times (in seconds) and counts."""
+        return {"times": dict(self.times), "counts": dict(self.counts)}
+
+    def attach(self, merged, name):
+        """
+        Store the profile in the `attrs` of the merged data frame, as
+        "profile", and log it.
+        """
+        merged.attrs["profile"] = self.to_dict()
+        logger.info(
+            "%s: %s",
+            name,
+            ", ".join(
+                [f"{stage}={seconds:.3f}s" for stage, seconds in self.times.items()]
+                + [f"{count}={value}" for count, value in self.counts.items()]
+            ),
+        )
+        return merged
+
+
 def check_calling_signature(f, args, kwargs):
 
     # Enforce calling signature
@@ -71,7 +326,10 @@ def check_calling_signature(f, args, kwargs):
     for param in bound_args.arguments:
         value = bound_args.arguments[param]
         if param in types:
-            if not isinstance(value, types[param]):
+            expected = types[param]
+            if typing.get_origin(expected) is typing.Union:
+                expected = typing.get_args(expected)
+            if not isinstance(value, expected):
                 raise TypeError(
                     f"Wrong type for parameter {param}, expected {types[param]}, got {type(value)}"
                 )
@@ -120,6 +378,7 @@ def pipeable(f):
                 toret = pd.concat(
                     [matched, new_matches], axis=0, sort=False
                 ).sort_index()
+                toret.attrs = new_matches.attrs
             else:
                 warnings.warn(
                     "All rows in 'left' have a match, skipping additional merge function call"